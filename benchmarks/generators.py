@@ -0,0 +1,179 @@
+import math
+import random
+
+from src.node import Node, QTable
+
+
+def _build_nodes(states, transitions, rewards, terminal):
+    """
+    Create Node objects sharing one QTable, like initialize_nodes does.
+    :param states: Dictionary mapping node IDs to state tuples.
+    :param transitions: Dictionary mapping node IDs to their {(current, action, next): probability} dict.
+    :param rewards: Dictionary mapping node IDs to their {(current, action, next): reward} dict.
+    :param terminal: Set of terminal node IDs.
+    :return: A dictionary mapping node IDs to Node objects.
+    """
+    actions = sorted({key[1] for node_transitions in transitions.values() for key in node_transitions})
+    q_table = QTable(actions=actions, capacity=len(states))
+    nodes = {}
+    for node_id, state in states.items():
+        node = Node(node_id, state, transitions.get(node_id, {}), rewards.get(node_id, {}),
+                    is_terminal=node_id in terminal)
+        q_table.attach(node)
+        for action in node.get_possible_actions():
+            node.set_q_value(action, 0.0)
+        nodes[node_id] = node
+    return nodes
+
+
+def _split_probability(rng, count):
+    """
+    Draw a random probability vector of the given length.
+    :return: List of probabilities summing to 1.
+    """
+    weights = [rng.random() + 1e-3 for _ in range(count)]
+    total = sum(weights)
+    return [weight / total for weight in weights]
+
+
+def random_mdp(n_states, n_actions=3, branching=3, terminal_probability=0.1, seed=0):
+    """
+    Random sparse MDP: every (state, action) pair leads to `branching` random states and, with
+    probability terminal_probability, to the terminal state (the last ID).
+    :param n_states: Number of states including the terminal state.
+    :param n_actions: Number of actions per state.
+    :param branching: Number of random successors per (state, action).
+    :param terminal_probability: Probability of ending the episode on every step.
+    :param seed: Seed for the generator.
+    :return: A dictionary mapping node IDs to Node objects.
+    """
+    rng = random.Random(seed)
+    terminal = n_states - 1
+    actions = [f"a{j}" for j in range(n_actions)]
+    states, transitions, rewards = {}, {}, {}
+    for s in range(n_states - 1):
+        states[s] = ("random", s)
+        transitions[s], rewards[s] = {}, {}
+        for action in actions:
+            successors = rng.sample(range(n_states - 1), min(branching, n_states - 1))
+            probs = _split_probability(rng, len(successors))
+            for next_state, prob in zip(successors, probs):
+                transitions[s][(s, action, next_state)] = prob * (1 - terminal_probability)
+                rewards[s][(s, action, next_state)] = round(rng.uniform(-1, 1), 3)
+            transitions[s][(s, action, terminal)] = terminal_probability
+            rewards[s][(s, action, terminal)] = 0
+    states[terminal] = ("random", "end")
+    return _build_nodes(states, transitions, rewards, {terminal})
+
+
+def grid_world(width, height, slip=0.1):
+    """
+    Grid world with actions N/S/E/W, a step cost of -1 and a terminal goal in the far corner.
+    With probability slip the move goes to a random neighbouring direction instead.
+    :param width: Number of columns.
+    :param height: Number of rows.
+    :param slip: Probability of slipping to another direction.
+    :return: A dictionary mapping node IDs to Node objects.
+    """
+    moves = {'N': (0, -1), 'S': (0, 1), 'E': (1, 0), 'W': (-1, 0)}
+    goal = width * height - 1
+    states, transitions, rewards = {}, {}, {}
+    for y in range(height):
+        for x in range(width):
+            s = y * width + x
+            states[s] = ("grid", x, y)
+            if s == goal:
+                continue
+            transitions[s], rewards[s] = {}, {}
+            for action in moves:
+                for direction, (dx, dy) in moves.items():
+                    prob = 1 - slip if direction == action else slip / 3
+                    if prob <= 0:
+                        continue
+                    nx, ny = min(max(x + dx, 0), width - 1), min(max(y + dy, 0), height - 1)
+                    next_state = ny * width + nx
+                    key = (s, action, next_state)
+                    transitions[s][key] = transitions[s].get(key, 0) + prob
+                    rewards[s][key] = 10 if next_state == goal else -1
+    return _build_nodes(states, transitions, rewards, {goal})
+
+
+def layered_dag(n_layers, width, n_actions=3, branching=2, seed=0):
+    """
+    Layered acyclic MDP in the style of initialize_nodes: every action of a layer-l state leads to
+    `branching` states of layer l + 1, and the last layer leads to a single terminal state.
+    :param n_layers: Number of layers.
+    :param width: States per layer.
+    :param n_actions: Number of actions per state.
+    :param branching: Successors per (state, action).
+    :param seed: Seed for the generator.
+    :return: A dictionary mapping node IDs to Node objects.
+    """
+    rng = random.Random(seed)
+    terminal = n_layers * width
+    actions = ['P', 'R', 'S', 'T', 'U', 'V'][:n_actions] if n_actions <= 6 else [f"a{j}" for j in range(n_actions)]
+    states, transitions, rewards = {}, {}, {}
+    for layer in range(n_layers):
+        for k in range(width):
+            s = layer * width + k
+            states[s] = ("layer", layer, k)
+            transitions[s], rewards[s] = {}, {}
+            for action in actions:
+                if layer == n_layers - 1:
+                    successors = [terminal]
+                else:
+                    successors = [(layer + 1) * width + k2 for k2 in rng.sample(range(width), min(branching, width))]
+                for next_state, prob in zip(successors, _split_probability(rng, len(successors))):
+                    transitions[s][(s, action, next_state)] = prob
+                    rewards[s][(s, action, next_state)] = rng.randint(-1, 4)
+    states[terminal] = ("layer", "end")
+    return _build_nodes(states, transitions, rewards, {terminal})
+
+
+def chain(n_states, branching=2, seed=0):
+    """
+    Chain MDP: action 'F' advances 1..branching states, action 'J' jumps up to 2 * branching states
+    at a higher cost. The last state is terminal.
+    :param n_states: Number of states.
+    :param branching: Number of possible successors per action.
+    :param seed: Seed for the generator.
+    :return: A dictionary mapping node IDs to Node objects.
+    """
+    rng = random.Random(seed)
+    terminal = n_states - 1
+    states, transitions, rewards = {}, {}, {}
+    for s in range(n_states):
+        states[s] = ("chain", s)
+        if s == terminal:
+            continue
+        transitions[s], rewards[s] = {}, {}
+        for action, reach, cost in (('F', 1, -1), ('J', 2, -3)):
+            successors = sorted({min(s + step * reach, terminal) for step in range(1, branching + 1)})
+            for next_state, prob in zip(successors, _split_probability(rng, len(successors))):
+                transitions[s][(s, action, next_state)] = prob
+                rewards[s][(s, action, next_state)] = cost
+    return _build_nodes(states, transitions, rewards, {terminal})
+
+
+def generate(kind, n_states, seed=0, branching=None):
+    """
+    Build an MDP of roughly n_states states with one of the generators above.
+    :param kind: "random", "grid", "layered" or "chain".
+    :param n_states: Approximate number of states.
+    :param seed: Seed for the generator.
+    :param branching: Successors per (state, action) for the random, layered and chain generators;
+                      None keeps each generator's default. Grid worlds have a fixed branching.
+    :return: A dictionary mapping node IDs to Node objects.
+    """
+    options = {} if branching is None else {"branching": branching}
+    if kind == "random":
+        return random_mdp(max(n_states, 2), seed=seed, **options)
+    if kind == "grid":
+        side = max(2, int(math.isqrt(n_states)))
+        return grid_world(side, side)
+    if kind == "layered":
+        width = max(1, int(math.isqrt(n_states)))
+        return layered_dag(max(1, (n_states - 1) // width), width, seed=seed, **options)
+    if kind == "chain":
+        return chain(max(n_states, 2), seed=seed, **options)
+    raise ValueError(f"Unknown MDP generator: {kind!r}")
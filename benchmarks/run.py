@@ -0,0 +1,228 @@
+import argparse
+import json
+import platform
+import random
+import subprocess
+import time
+import tracemalloc
+
+import numpy as np
+
+from benchmarks.generators import generate
+from src.model import compile_model
+from src.monte_carlo import run_experiment
+from src.q_learning import q_learning
+from src.value_iteration import solve_value_iteration, value_iteration
+
+# Pure-Python solvers are skipped above this many states unless --max-python-states says otherwise
+DEFAULT_MAX_PYTHON_STATES = 10000
+
+
+def _measure(function, nodes, args):
+    """
+    Run a function once for wall-clock time and once more under tracemalloc for peak memory.
+    Tracing slows pure-Python loops several times more than NumPy code, so it is kept out of the timed run.
+    The nodes are reset and the random module reseeded before each run, so both runs do the same work.
+    :param function: Callable without arguments.
+    :param nodes: Dictionary of nodes the function works on.
+    :param args: Parsed command line arguments.
+    :return: Tuple (result of the timed run, seconds, peak bytes).
+    """
+    _reset(nodes)
+    random.seed(args.seed)
+    start = time.perf_counter()
+    result = function()
+    elapsed = time.perf_counter() - start
+
+    _reset(nodes)
+    random.seed(args.seed)
+    tracemalloc.start()
+    try:
+        function()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def bench_value_iteration(nodes, args):
+    """
+    Time the node-based value_iteration.
+    :return: Dictionary of metrics.
+    """
+    iterations = []
+
+    def run():
+        iterations.clear()
+        value_iteration(nodes, discount_factor=args.gamma, callback=iterations.append)
+
+    _, elapsed, peak = _measure(run, nodes, args)
+    backups = len(iterations) * len(nodes)
+    return {"wall_time": elapsed, "peak_memory": peak, "iterations": len(iterations),
+            "backups_per_sec": backups / elapsed if elapsed else None}
+
+
+def bench_solve_value_iteration(nodes, args, mode):
+    """
+    Time model compilation plus the array-based solve_value_iteration in the given mode.
+    :return: Dictionary of metrics.
+    """
+    def run():
+        model = compile_model(nodes)
+        return solve_value_iteration(model, discount_factor=args.gamma, mode=mode)
+
+    (_, _, stats), elapsed, peak = _measure(run, nodes, args)
+    return {"wall_time": elapsed, "peak_memory": peak, "iterations": stats["iterations"],
+            "solve_time": stats["time"],
+            "backups_per_sec": stats["backups"] / stats["time"] if stats["time"] else None}
+
+
+def bench_q_learning(nodes, args):
+    """
+    Time the node-based q_learning over a fixed number of episodes.
+    :return: Dictionary of metrics.
+    """
+    episodes = []
+
+    def run():
+        episodes.clear()
+        # A negative threshold disables the early stop after an episode without Q-value changes
+        q_learning(nodes, episodes=args.episodes, gamma=args.gamma, threshold=-1, callback=episodes.append)
+
+    _, elapsed, peak = _measure(run, nodes, args)
+    return {"wall_time": elapsed, "peak_memory": peak, "episodes_requested": args.episodes,
+            "episodes": len(episodes), "episodes_per_sec": len(episodes) / elapsed if elapsed else None}
+
+
+def bench_monte_carlo(nodes, args, vectorized):
+    """
+    Time run_experiment from the first node, one episode at a time or with the batched simulator.
+    :return: Dictionary of metrics.
+    """
+    start_node = next(iter(nodes.values()))
+    _, elapsed, peak = _measure(lambda: run_experiment(start_node, nodes, episodes=args.episodes,
+                                                       vectorized=vectorized, seed=args.seed), nodes, args)
+    return {"wall_time": elapsed, "peak_memory": peak, "episodes": args.episodes,
+            "episodes_per_sec": args.episodes / elapsed if elapsed else None}
+
+
+# Benchmark name -> (function, runs only on small models)
+SOLVERS = {
+    "value_iteration": (bench_value_iteration, True),
+    "solve_value_iteration_sync": (lambda nodes, args: bench_solve_value_iteration(nodes, args, "sync"), False),
+    "solve_value_iteration_gauss_seidel":
+        (lambda nodes, args: bench_solve_value_iteration(nodes, args, "gauss_seidel"), False),
+    "q_learning": (bench_q_learning, True),
+    "monte_carlo": (lambda nodes, args: bench_monte_carlo(nodes, args, False), True),
+    "monte_carlo_vectorized": (lambda nodes, args: bench_monte_carlo(nodes, args, True), False),
+}
+
+
+def _reset(nodes):
+    """
+    Restore the solver state of generated nodes (values, policies and Q-values) so the next solver
+    starts from the same model without regenerating it. Successor caches are dropped as well, so no
+    solver benefits from caches warmed up by the previous one.
+    :return: None
+    """
+    tables = {}
+    for node in nodes.values():
+        node.value = 0
+        node.policy = None
+        node.invalidate_cache()
+        if node.q_table is not None:
+            tables[id(node.q_table)] = node.q_table
+    for table in tables.values():
+        table.values[:] = 0.0
+
+
+def _git_revision():
+    """
+    Current git commit of the working tree, if available.
+    :return: Commit hash or None.
+    """
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(args):
+    """
+    Run every selected solver on every selected generator and size.
+    :param args: Parsed command line arguments.
+    :return: Report dictionary.
+    """
+    results = []
+    for kind in args.generators:
+        for size in args.sizes:
+            start = time.perf_counter()
+            nodes = generate(kind, size, seed=args.seed, branching=args.branching)
+            build_time = time.perf_counter() - start
+            nnz = sum(len(node.transitions) for node in nodes.values())
+            for name in args.solvers:
+                function, python_only = SOLVERS[name]
+                if python_only and len(nodes) > args.max_python_states:
+                    continue
+                # Every solver starts from the same model, reset instead of regenerated (see _measure)
+                metrics = function(nodes, args)
+                results.append({"generator": kind, "n_states": len(nodes), "nnz": nnz, "solver": name,
+                                "build_time": build_time, **metrics})
+                print(f"{kind:8s} {len(nodes):>9d} {name:36s} {metrics['wall_time']:>10.4f}s")
+    return {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "git_revision": _git_revision(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "settings": {"gamma": args.gamma, "episodes": args.episodes, "seed": args.seed, "branching": args.branching},
+        "results": results,
+    }
+
+
+def compare(baseline, report):
+    """
+    Print the wall-time ratio of every benchmark present in both reports.
+    :param baseline: Earlier report dictionary.
+    :param report: New report dictionary.
+    :return: None
+    """
+    def key(result):
+        return result["generator"], result["n_states"], result["solver"]
+
+    previous = {key(result): result for result in baseline["results"]}
+    print("\nChange versus baseline (new / old wall time):")
+    for result in report["results"]:
+        old = previous.get(key(result))
+        if old and old["wall_time"]:
+            print(f"{result['generator']:8s} {result['n_states']:>9d} {result['solver']:36s} "
+                  f"{result['wall_time'] / old['wall_time']:>7.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the MDP solvers on synthetic models.")
+    parser.add_argument("--generators", nargs="+", default=["random", "grid", "layered", "chain"],
+                        choices=["random", "grid", "layered", "chain"])
+    parser.add_argument("--sizes", nargs="+", type=int, default=[10, 100, 1000])
+    parser.add_argument("--solvers", nargs="+", default=list(SOLVERS), choices=list(SOLVERS))
+    parser.add_argument("--episodes", type=int, default=100)
+    parser.add_argument("--gamma", type=float, default=0.99)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--branching", type=int,
+                        help="Successors per (state, action) for the random, layered and chain generators.")
+    parser.add_argument("--max-python-states", type=int, default=DEFAULT_MAX_PYTHON_STATES)
+    parser.add_argument("--output", default="benchmark_report.json", help="Where to write the JSON report.")
+    parser.add_argument("--compare", help="Earlier JSON report to compare against.")
+    args = parser.parse_args()
+
+    report = run_benchmarks(args)
+    with open(args.output, "w") as file:
+        json.dump(report, file, indent=2)
+    print(f"\nReport written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as file:
+            compare(json.load(file), report)
+
+
+if __name__ == "__main__":
+    main()
@@ -11,7 +11,7 @@ if __name__ == "__main__":
 
     # Step 2: Run Monte Carlo
     print("Starting Monte Carlo...\n")
-    run_experiment(nodes[0], nodes)
+    run_experiment(nodes[0], nodes, verbose=2)
 
     # Step 3: Display final results
     print("\nFinal Results Monte Carlo:")
@@ -11,7 +11,7 @@ if __name__ == "__main__":
 
     # Step 2: Run Q-learning
     print("Starting Q-learning...\n")
-    q_learning(nodes)
+    q_learning(nodes, verbose=1)
 
     # Step 3: Display final results
     print("\nFinal Results After Q-learning:")
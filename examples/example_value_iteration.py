@@ -11,7 +11,7 @@ if __name__ == "__main__":
 
     # Step 2: Run value iteration
     print("Starting Value Iteration...\n")
-    value_iteration(nodes)
+    value_iteration(nodes, verbose=1)
 
     # Step 3: Display final results
     print("\nFinal Results After Value Iteration:")
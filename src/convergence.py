@@ -0,0 +1,115 @@
+import time
+
+import numpy as np
+
+STOP_RULES = ("max_norm", "span", "policy_stable")
+
+
+class ConvergenceMonitor:
+    def __init__(self, threshold=0.001, rules=("max_norm",), patience=5, max_iterations=None):
+        """
+        Shared convergence instrumentation and early-stopping controller for the solvers.
+        Every iteration (sweep or episode) records its residual, span, policy changes, backups and timing.
+        :param threshold: Tolerance used by the "max_norm" and "span" rules.
+        :param rules: Stopping rules; the solver stops as soon as any of them holds:
+                      "max_norm" (largest value change <= threshold),
+                      "span" (span seminorm max(dV) - min(dV) <= threshold),
+                      "policy_stable" (greedy policy unchanged for `patience` consecutive iterations).
+        :param patience: Number of consecutive iterations without policy changes for "policy_stable".
+        :param max_iterations: Optional hard cap on the number of iterations.
+        """
+        unknown = set(rules) - set(STOP_RULES)
+        if unknown:
+            raise ValueError(f"Unknown stopping rules: {sorted(unknown)}")
+        self.threshold = threshold
+        self.rules = tuple(rules)
+        self.patience = patience
+        self.max_iterations = max_iterations
+        self.stable_iterations = 0
+        self.stop_reason = None
+
+        self.residuals, self.spans, self.policy_changes = [], [], []
+        self.backups, self.timestamps = [], []
+        self.start_time = time.perf_counter()
+
+    @property
+    def tracks_policy(self):
+        """
+        Whether solvers need to count policy changes for this monitor.
+        :return: True if the "policy_stable" rule is active.
+        """
+        return "policy_stable" in self.rules
+
+    @property
+    def iterations(self):
+        """
+        Number of recorded iterations.
+        """
+        return len(self.residuals)
+
+    def update(self, residual, span=None, policy_changes=None, backups=0):
+        """
+        Record one iteration and decide whether the solver should stop.
+        :param residual: Largest absolute value change of the iteration.
+        :param span: Span of the value changes (max - min); defaults to the residual.
+        :param policy_changes: Number of states whose greedy action changed (None if not tracked).
+        :param backups: Number of state (or state-action) backups performed in the iteration.
+        :return: True if a stopping rule holds.
+        """
+        self.residuals.append(residual)
+        self.spans.append(residual if span is None else span)
+        self.policy_changes.append(-1 if policy_changes is None else policy_changes)
+        self.backups.append(backups)
+        self.timestamps.append(time.perf_counter() - self.start_time)
+
+        if policy_changes == 0:
+            self.stable_iterations += 1
+        elif policy_changes is not None:
+            self.stable_iterations = 0
+
+        if "max_norm" in self.rules and residual <= self.threshold:
+            self.stop_reason = "max_norm"
+        elif "span" in self.rules and self.spans[-1] <= self.threshold:
+            self.stop_reason = "span"
+        elif "policy_stable" in self.rules and self.stable_iterations >= self.patience:
+            self.stop_reason = "policy_stable"
+        elif self.max_iterations is not None and self.iterations >= self.max_iterations:
+            self.stop_reason = "max_iterations"
+        return self.stop_reason is not None
+
+    def update_arrays(self, old_values, new_values, old_policy=None, new_policy=None, backups=0, active=None):
+        """
+        Record one iteration of an array-based solver from its value (and policy) arrays.
+        :param active: Optional boolean mask of the states that are backed up (e.g., model.has_actions);
+                       the span only covers these, since the others never change.
+        :return: True if a stopping rule holds.
+        """
+        delta = new_values - old_values
+        residual = float(np.max(np.abs(delta), initial=0.0))
+        changes = delta if active is None else delta[active]
+        span = float(changes.max() - changes.min()) if len(changes) else 0.0
+        policy_changes = None
+        if old_policy is not None and new_policy is not None:
+            policy_changes = int(np.count_nonzero(old_policy != new_policy))
+        return self.update(residual, span, policy_changes, backups)
+
+    def trace(self):
+        """
+        Export the recorded history for profiling.
+        :return: Dictionary of NumPy arrays: "residual", "span", "policy_changes" (-1 where not tracked),
+                 "backups", "elapsed", "iteration_time" and "backups_per_sec".
+        """
+        elapsed = np.array(self.timestamps)
+        iteration_time = np.diff(elapsed, prepend=0.0)
+        backups = np.array(self.backups, dtype=np.int64)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            backups_per_sec = np.where(iteration_time > 0, backups / iteration_time, np.nan)
+        return {
+            "residual": np.array(self.residuals),
+            "span": np.array(self.spans),
+            "policy_changes": np.array(self.policy_changes, dtype=np.int64),
+            "backups": backups,
+            "elapsed": elapsed,
+            "iteration_time": iteration_time,
+            "backups_per_sec": backups_per_sec,
+        }
@@ -0,0 +1,150 @@
+import math
+import random
+from bisect import bisect_right
+
+
+class ExplorationPolicy:
+    def __init__(self, seed=None):
+        """
+        Behavior policy used by q_learning and run_episode to pick actions.
+        Subclasses keep per-state structures up to date through observe(), so select() does not
+        have to rescan every Q-value on each step.
+        :param seed: Seed for the policy's own random generator.
+        """
+        self.rng = random.Random(seed)
+
+    def select(self, node):
+        """
+        Choose an action in the given node.
+        :param node: Current Node (must have at least one action).
+        :return: Selected action.
+        """
+        return self.rng.choice(node.get_possible_actions())
+
+    def observe(self, node, action, q_value):
+        """
+        Notify the policy that Q(node, action) has been set to q_value.
+        :return: None
+        """
+
+    def invalidate(self):
+        """
+        Drop all cached per-state structures (e.g., after a batched update of many Q-values).
+        :return: None
+        """
+
+
+class EpsilonGreedy(ExplorationPolicy):
+    def __init__(self, epsilon=0.1, seed=None):
+        """
+        Epsilon-greedy exploration with an incrementally maintained argmax per state.
+        :param epsilon: Probability of choosing a uniformly random action.
+        :param seed: Seed for the policy's own random generator.
+        """
+        super().__init__(seed)
+        self.epsilon = epsilon
+        self.best = {}  # node ID -> (best action, its Q-value)
+
+    def _rescan(self, node):
+        """
+        Recompute the greedy action of a single node.
+        :return: Tuple (best action, its Q-value).
+        """
+        best_action = max(node.get_possible_actions(), key=node.q_value)
+        self.best[node.id] = (best_action, node.q_value(best_action))
+        return self.best[node.id]
+
+    def select(self, node):
+        if self.rng.random() < self.epsilon:
+            return self.rng.choice(node.get_possible_actions())
+        best = self.best.get(node.id)
+        if best is None:
+            best = self._rescan(node)
+        return best[0]
+
+    def observe(self, node, action, q_value):
+        best = self.best.get(node.id)
+        if best is None:
+            return
+        best_action, best_value = best
+        if q_value >= best_value:
+            self.best[node.id] = (action, q_value)
+        elif action == best_action:
+            # The greedy action got worse; only this state needs a rescan
+            self._rescan(node)
+
+    def invalidate(self):
+        self.best.clear()
+
+
+class Softmax(ExplorationPolicy):
+    def __init__(self, temperature=1.0, seed=None):
+        """
+        Boltzmann exploration: P(a) proportional to exp(Q(s, a) / temperature).
+        The cumulative weights of a state are rebuilt only after one of its Q-values changed,
+        and sampling is a binary search.
+        :param temperature: Softmax temperature (higher explores more).
+        :param seed: Seed for the policy's own random generator.
+        """
+        super().__init__(seed)
+        self.temperature = temperature
+        self.tables = {}  # node ID -> (actions, cumulative weights)
+
+    def _rebuild(self, node):
+        """
+        Build the cumulative weight table of a single node.
+        :return: Tuple (actions, cumulative weights).
+        """
+        actions = node.get_possible_actions()
+        q_values = [node.q_value(action) / self.temperature for action in actions]
+        top = max(q_values)  # Shift by the maximum for numerical stability
+        cumulative, total = [], 0.0
+        for q in q_values:
+            total += math.exp(q - top)
+            cumulative.append(total)
+        self.tables[node.id] = (actions, cumulative)
+        return self.tables[node.id]
+
+    def select(self, node):
+        table = self.tables.get(node.id)
+        if table is None:
+            table = self._rebuild(node)
+        actions, cumulative = table
+        index = bisect_right(cumulative, self.rng.random() * cumulative[-1])
+        return actions[min(index, len(actions) - 1)]
+
+    def observe(self, node, action, q_value):
+        self.tables.pop(node.id, None)
+
+    def invalidate(self):
+        self.tables.clear()
+
+
+class UCB(ExplorationPolicy):
+    def __init__(self, c=1.0, seed=None):
+        """
+        Upper-confidence-bound exploration: argmax Q(s, a) + c * sqrt(ln N(s) / N(s, a)),
+        trying every action of a state once before using the bound.
+        :param c: Exploration coefficient.
+        :param seed: Seed for the policy's own random generator.
+        """
+        super().__init__(seed)
+        self.c = c
+        self.counts = {}  # node ID -> {action: visits}
+        self.totals = {}  # node ID -> total visits
+
+    def select(self, node):
+        counts = self.counts.setdefault(node.id, {})
+        actions = node.get_possible_actions()
+        untried = [action for action in actions if action not in counts]
+        if untried:
+            action = untried[0]
+        else:
+            log_total = math.log(self.totals[node.id])
+            # The bonus of every action grows with N(s), so this scans the state's own actions only
+            action = max(actions, key=lambda a: node.q_value(a) + self.c * math.sqrt(log_total / counts[a]))
+
+        # Count the visit as soon as the action is taken
+        counts[action] = counts.get(action, 0) + 1
+        self.totals[node.id] = self.totals.get(node.id, 0) + 1
+        return action
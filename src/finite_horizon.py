@@ -0,0 +1,59 @@
+import numpy as np
+
+from src.model import compile_model
+
+
+def solve_finite_horizon(model, horizon, discount_factor=1.0, terminal_values=None, memory_light=False):
+    """
+    Backward induction for a finite horizon: V_H = terminal values, and for t = H-1, ..., 0
+    V_t(s) = max_a sum_s' P(s'|s,a) * (R(s,a,s') + gamma * V_{t+1}(s')), with pi_t the maximizing action.
+    Each stage is one vectorized backup, so the total work is O(H * nnz(P)) and no threshold is involved.
+    :param model: Compiled MDPModel (see src.model.compile_model).
+    :param horizon: Number of decision stages H.
+    :param discount_factor: Discount factor (gamma); 1.0 for undiscounted scheduling problems.
+    :param terminal_values: Optional values V_H at the end of the horizon; zeros by default.
+                            States without actions keep this value at every stage.
+    :param memory_light: Only keep the current and next stage and return V_0 and pi_0.
+    :return: Tuple (values, policy): arrays of shape (H + 1, n_states) and (H, n_states) indexed by
+             [stage, state], or the stage-0 rows of shape (n_states,) when memory_light is set.
+             Policies are action indices, -1 where no action exists.
+    """
+    if horizon < 0:
+        raise ValueError("The horizon must be non-negative")
+    if terminal_values is None:
+        next_values = np.zeros(model.n_states)
+    else:
+        next_values = np.array(terminal_values, dtype=np.float64)
+
+    if memory_light:
+        policy = np.full(model.n_states, -1, dtype=np.int64)
+        for _ in range(horizon):
+            next_values, policy = model.greedy(next_values, discount_factor)
+        return next_values, policy
+
+    values = np.empty((horizon + 1, model.n_states))
+    policy = np.empty((horizon, model.n_states), dtype=np.int64)
+    values[horizon] = next_values
+    for t in range(horizon - 1, -1, -1):
+        values[t], policy[t] = model.greedy(values[t + 1], discount_factor)
+    return values, policy
+
+
+def backward_induction(nodes, horizon, discount_factor=1.0, memory_light=False):
+    """
+    Solve the nodes as a finite-horizon MDP (see solve_finite_horizon), using the current Node.value as V_H.
+    :param nodes: Dictionary of nodes (states) indexed by their IDs.
+    :param horizon: Number of decision stages H.
+    :param discount_factor: Discount factor (gamma) for future rewards.
+    :param memory_light: Only keep the current and next stage and return V_0 and pi_0.
+    :return: Tuple (values, policy) as returned by solve_finite_horizon, with states ordered like
+             compile_model(nodes).state_ids. Node values and policies are set to stage 0 (V_0 and pi_0).
+    """
+    model = compile_model(nodes)
+    values, policy = solve_finite_horizon(model, horizon, discount_factor=discount_factor,
+                                          terminal_values=model.values_from_nodes(nodes), memory_light=memory_light)
+    if memory_light:
+        model.write_back(nodes, values, policy if horizon else None)
+    else:
+        model.write_back(nodes, values[0], policy[0] if horizon else None)
+    return values, policy
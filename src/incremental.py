@@ -0,0 +1,88 @@
+import heapq
+
+
+def build_predecessors(nodes):
+    """
+    Build the reverse-transition index: for every node, the IDs of the nodes that can reach it in one step.
+    :param nodes: Dictionary of nodes (states) indexed by their IDs.
+    :return: Dictionary mapping node IDs to sets of predecessor IDs.
+    """
+    predecessors = {node_id: set() for node_id in nodes}
+    for node in nodes.values():
+        for (current, _, next_state), prob in node.transitions.items():
+            if prob > 0 and next_state in predecessors:
+                predecessors[next_state].add(node.id)
+    return predecessors
+
+
+def _backup(node, nodes, discount_factor):
+    """
+    Bellman backup of a single node, exactly as value_iteration performs it.
+    :return: Tuple (best action value, best action). Nodes without actions keep their value.
+    """
+    best_action_value = -float('inf')
+    best_action = None
+    for action in node.get_possible_actions():
+        action_value = node.get_next_state_value(action, nodes, discount_factor)
+        if action_value > best_action_value:
+            best_action_value = action_value
+            best_action = action
+    if best_action is None:
+        return node.value, node.policy
+    return best_action_value, best_action
+
+
+def incremental_update(nodes, edits, threshold=0.001, discount_factor=0.99, predecessors=None):
+    """
+    Re-solve after editing a few entries of node.transitions / node.rewards in place.
+    Starts from the current Node.value/Node.policy and only backs up the edited states and, while
+    their values keep changing by more than the threshold, their predecessors.
+    :param nodes: Dictionary of nodes (states) indexed by their IDs, already solved (e.g., by value_iteration).
+    :param edits: Iterable of edited (current_node, action, next_node) keys.
+    :param threshold: Changes at or below this value are not propagated further.
+    :param discount_factor: Discount factor (gamma) for future rewards.
+    :param predecessors: Reverse-transition index from build_predecessors, reused across calls;
+                         built here when not given. New transitions in the edits are added to it.
+    :return: Dictionary with "backups" (number of node backups) and "updated" (set of node IDs whose value changed).
+    """
+    if predecessors is None:
+        predecessors = build_predecessors(nodes)
+
+    # Extend the reverse index with new transitions (the edited nodes refresh their own caches)
+    priority = {}
+    for current, _, next_state in edits:
+        if next_state in predecessors:
+            predecessors[next_state].add(current)
+        priority[current] = float('inf')
+
+    # Largest pending change first (prioritized sweeping); stale heap entries are skipped
+    heap = [(-change, order, node_id) for order, (node_id, change) in enumerate(priority.items())]
+    heapq.heapify(heap)
+    order = len(heap)
+
+    backups = 0
+    updated = set()
+    while heap:
+        negative_change, _, node_id = heapq.heappop(heap)
+        if priority.get(node_id) != -negative_change:
+            continue
+        del priority[node_id]
+        node = nodes[node_id]
+
+        old_value = node.value
+        node.value, node.policy = _backup(node, nodes, discount_factor)
+        backups += 1
+
+        # Only propagate changes that matter to the nodes that depend on this one
+        change = abs(node.value - old_value)
+        if change > threshold:
+            updated.add(node_id)
+            for predecessor in predecessors.get(node_id, ()):
+                if change > priority.get(predecessor, 0):
+                    priority[predecessor] = change
+                    order += 1
+                    heapq.heappush(heap, (-change, order, predecessor))
+        elif node.value != old_value:
+            updated.add(node_id)
+
+    return {"backups": backups, "updated": updated}
@@ -1,4 +1,4 @@
-from src.node import Node
+from src.node import Node, QTable
 
 def initialize_nodes():
     """
@@ -46,7 +46,11 @@ def initialize_nodes():
         (9, 'P', 10): 3, (9, 'R', 10): 3, (9, 'S', 10): 3,
     }
 
+    # All nodes share one array-backed Q-table
+    q_table = QTable(actions=sorted({action for _, action, _ in transitions}), capacity=11)
+
     for node in [node0, node1, node2, node3, node4, node5, node6, node7, node8, node9, node10]:
+        q_table.attach(node)
         node.rewards = {key: value for key, value in rewards.items() if key[0] == node.id}
         node.transitions = {key: value for key, value in transitions.items() if key[0] == node.id}
 
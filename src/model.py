@@ -0,0 +1,249 @@
+from functools import cached_property
+
+import numpy as np
+
+
+class MDPModel:
+    def __init__(self, state_ids, actions, indptr, indices, probs, rewards, action_mask, terminal, labels=None):
+        """
+        Compiled, array-backed representation of an MDP.
+        Rows of the sparse transition table are (state, action) pairs flattened as state * n_actions + action,
+        so the successors of (s, a) are indices[indptr[r]:indptr[r + 1]] with r = s * n_actions + a.
+        :param state_ids: Sequence of node IDs, position i is state index i.
+        :param actions: Sequence of action labels, position j is action index j.
+        :param indptr: CSR row pointer array of length n_states * n_actions + 1.
+        :param indices: Successor state index for every stored transition.
+        :param probs: Transition probability for every stored transition.
+        :param rewards: Reward for every stored transition.
+        :param action_mask: Boolean (n_states, n_actions) array, True where the action is available.
+        :param terminal: Boolean array flagging terminal states.
+        :param labels: Optional sequence (or array) of state tuples (e.g., ('R', 'U', '8p')).
+        """
+        self.state_ids = list(state_ids)
+        self.actions = list(actions)
+        self.labels = labels
+
+        self.n_states = len(self.state_ids)
+        self.n_actions = len(self.actions)
+
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.indices = np.asarray(indices, dtype=np.int64)
+        self.probs = np.asarray(probs, dtype=np.float64)
+        self.rewards = np.asarray(rewards, dtype=np.float64)
+        self.action_mask = np.asarray(action_mask, dtype=bool).reshape(self.n_states, self.n_actions)
+        self.terminal = np.asarray(terminal, dtype=bool)
+
+    # Derived structures are built on first use, so memory-mapped models load without touching the data
+    @cached_property
+    def state_index(self):
+        """
+        Map from node ID to state index.
+        """
+        return {state_id: i for i, state_id in enumerate(self.state_ids)}
+
+    @cached_property
+    def action_index(self):
+        """
+        Map from action label to action index.
+        """
+        return {action: j for j, action in enumerate(self.actions)}
+
+    @cached_property
+    def row(self):
+        """
+        Row (state * n_actions + action) of every stored transition, used for segment sums.
+        """
+        return np.repeat(np.arange(self.n_states * self.n_actions, dtype=np.int64), np.diff(self.indptr))
+
+    @cached_property
+    def expected_rewards(self):
+        """
+        Expected immediate reward of every (state, action) pair, as an (n_states, n_actions) array.
+        """
+        expected_rewards = np.bincount(self.row, weights=self.probs * self.rewards,
+                                       minlength=self.n_states * self.n_actions).astype(np.float64)
+        return expected_rewards.reshape(self.n_states, self.n_actions)
+
+    @cached_property
+    def has_actions(self):
+        """
+        States with at least one available action; the others keep their value during backups.
+        """
+        return self.action_mask.any(axis=1)
+
+    @property
+    def nnz(self):
+        """
+        Number of stored transitions.
+        :return: Length of the indices array.
+        """
+        return len(self.indices)
+
+    @property
+    def nbytes(self):
+        """
+        Memory used by the compiled arrays.
+        :return: Total size of the array buffers in bytes.
+        """
+        arrays = (self.indptr, self.indices, self.probs, self.rewards, self.action_mask,
+                  self.terminal, self.row, self.expected_rewards, self.has_actions)
+        return sum(array.nbytes for array in arrays)
+
+    def successors(self, state, action):
+        """
+        Look up the transitions of a single (state, action) pair.
+        :param state: State index.
+        :param action: Action index.
+        :return: Tuple (next state indices, probabilities, rewards) as array views.
+        """
+        row = state * self.n_actions + action
+        start, end = self.indptr[row], self.indptr[row + 1]
+        return self.indices[start:end], self.probs[start:end], self.rewards[start:end]
+
+    def q_values(self, values, discount_factor):
+        """
+        Compute Q(s, a) = sum_s' P(s'|s,a) * (R(s,a,s') + gamma * V(s')) for every pair at once.
+        :param values: Array of state values indexed by state index.
+        :param discount_factor: Discount factor (gamma) for future rewards.
+        :return: (n_states, n_actions) array, -inf where the action is unavailable.
+        """
+        expected_next = np.bincount(self.row, weights=self.probs * values[self.indices],
+                                    minlength=self.n_states * self.n_actions).reshape(self.n_states, self.n_actions)
+        q = self.expected_rewards + discount_factor * expected_next
+        q[~self.action_mask] = -np.inf
+        return q
+
+    def greedy(self, values, discount_factor):
+        """
+        Perform one synchronous Bellman backup.
+        :param values: Array of state values indexed by state index.
+        :param discount_factor: Discount factor (gamma) for future rewards.
+        :return: Tuple (new values, greedy action index per state, -1 where no action exists).
+        """
+        q = self.q_values(values, discount_factor)
+        policy = np.where(self.has_actions, q.argmax(axis=1), -1)
+        new_values = np.where(self.has_actions, q.max(axis=1), values)
+        return new_values, policy
+
+    def values_from_nodes(self, nodes):
+        """
+        Collect the current Node.value of every state into an array.
+        :param nodes: Dictionary of nodes indexed by their IDs.
+        :return: Array of values indexed by state index.
+        """
+        return np.array([nodes[state_id].value for state_id in self.state_ids], dtype=np.float64)
+
+    def policy_from_nodes(self, nodes):
+        """
+        Collect the current Node.policy of every state into an array of action indices.
+        :param nodes: Dictionary of nodes indexed by their IDs.
+        :return: Array of action indices, -1 where the node has no policy.
+        """
+        return np.array([self.action_index.get(nodes[state_id].policy, -1) for state_id in self.state_ids], dtype=np.int64)
+
+    def policy_labels(self, policy):
+        """
+        Translate an array of action indices back into action labels.
+        :param policy: Array of action indices, -1 meaning no action.
+        :return: List of action labels (None where no action exists).
+        """
+        return [self.actions[a] if a >= 0 else None for a in policy]
+
+    def write_back(self, nodes, values, policy=None):
+        """
+        Store solver results on the Node objects.
+        :param nodes: Dictionary of nodes indexed by their IDs.
+        :param values: Array of state values indexed by state index.
+        :param policy: Optional array of action indices, -1 meaning no action.
+        :return: None. Updates Node.value and Node.policy in place.
+        """
+        labels = self.policy_labels(policy) if policy is not None else None
+        for i, state_id in enumerate(self.state_ids):
+            node = nodes[state_id]
+            node.value = float(values[i])
+            if labels is not None:
+                node.policy = labels[i]
+
+    def dense(self):
+        """
+        Expand the model into dense tensors. Only intended for small models.
+        :return: Tuple (P, R) of (n_states, n_actions, n_states) arrays.
+        """
+        P = np.zeros((self.n_states * self.n_actions, self.n_states))
+        R = np.zeros((self.n_states * self.n_actions, self.n_states))
+        np.add.at(P, (self.row, self.indices), self.probs)
+        R[self.row, self.indices] = self.rewards
+        shape = (self.n_states, self.n_actions, self.n_states)
+        return P.reshape(shape), R.reshape(shape)
+
+    def transition_matrix(self):
+        """
+        Build the transition table as a SciPy CSR matrix of shape (n_states * n_actions, n_states).
+        :return: scipy.sparse.csr_matrix holding P[s * n_actions + a, s'].
+        """
+        from scipy import sparse  # SciPy is only needed for the sparse linear algebra helpers
+
+        return sparse.csr_matrix((self.probs, self.indices, self.indptr),
+                                 shape=(self.n_states * self.n_actions, self.n_states))
+
+
+def _sorted_labels(labels):
+    """
+    Sort labels when they are comparable, otherwise keep their first-seen order.
+    :param labels: Iterable of hashable labels.
+    :return: List of unique labels.
+    """
+    unique = list(dict.fromkeys(labels))
+    try:
+        return sorted(unique)
+    except TypeError:
+        return unique
+
+
+def compile_model(nodes):
+    """
+    Compile the dictionary of Node objects (e.g., from initialize_nodes) into an MDPModel.
+    The nodes are walked exactly once; all solvers can then work on the resulting arrays.
+    :param nodes: Dictionary of nodes (states) indexed by their IDs.
+    :return: MDPModel with state/action index maps and CSR transition arrays.
+    """
+    state_ids = list(nodes.keys())
+    state_index = {state_id: i for i, state_id in enumerate(state_ids)}
+    actions = _sorted_labels(key[1] for node in nodes.values() for key in node.transitions)
+    action_index = {action: j for j, action in enumerate(actions)}
+    n_actions = len(actions)
+
+    rows, indices, probs, rewards = [], [], [], []
+    available_rows = []
+    for i, state_id in enumerate(state_ids):
+        node = nodes[state_id]
+        for (current, action, next_state), prob in node.transitions.items():
+            row = i * n_actions + action_index[action]
+            available_rows.append(row)
+            # Zero-probability entries mark the action as available but never contribute
+            if prob <= 0:
+                continue
+            if next_state not in state_index:
+                raise ValueError(f"Transition {(current, action, next_state)} leads to unknown state {next_state!r}")
+            rows.append(row)
+            indices.append(state_index[next_state])
+            probs.append(prob)
+            rewards.append(node.rewards.get((current, action, next_state), 0))
+
+    rows = np.asarray(rows, dtype=np.int64)
+    # Stable sort keeps the dict order of transitions within each (state, action) row
+    order = np.argsort(rows, kind="stable")
+    counts = np.bincount(rows, minlength=len(state_ids) * n_actions)
+    indptr = np.concatenate(([0], np.cumsum(counts)))
+
+    action_mask = np.zeros(len(state_ids) * n_actions, dtype=bool)
+    action_mask[np.asarray(available_rows, dtype=np.int64)] = True
+
+    terminal = np.array([nodes[state_id].is_terminal() for state_id in state_ids], dtype=bool)
+    labels = [nodes[state_id].state for state_id in state_ids]
+
+    return MDPModel(state_ids, actions, indptr,
+                    np.asarray(indices, dtype=np.int64)[order],
+                    np.asarray(probs, dtype=np.float64)[order],
+                    np.asarray(rewards, dtype=np.float64)[order],
+                    action_mask, terminal, labels)
@@ -1,19 +1,31 @@
 import random
+import warnings
+from collections.abc import Mapping
 
-def run_episode(start_node, nodes):
+import numpy as np
+
+from src.model import compile_model
+from src.reporting import should_report
+from src.simulator import EpisodeSimulator
+
+def run_episode(start_node, nodes, policy=None):
     """
     Simulate a single episode starting from the given node.
     :param start_node: The starting Node object.
     :param nodes: Dictionary of all nodes.
+    :param policy: Optional ExplorationPolicy used to select actions (uniform random by default).
     :return: Sequence of experiences [(node_id, action, reward)], total reward.
     """
     current_node = start_node
     experiences = []
     total_reward = 0
 
-    while current_node.id != 10:  # Assuming Node 10 is the terminal node
+    while not current_node.is_terminal():
         # Select an action
-        action = current_node.select_action()
+        if policy is None:
+            action = current_node.select_action()
+        else:
+            action = policy.select(current_node)
 
         # Determine the next node
         next_node_id = current_node.get_next_node(action)
@@ -32,54 +44,269 @@ def run_episode(start_node, nodes):
     return experiences, total_reward
 
 
-def monte_carlo_update(visited_nodes, total_reward, nodes, alpha=0.1):
+def monte_carlo_update(experiences, nodes, alpha=0.1, discount_factor=1.0, every_visit=False):
     """
-    Perform first-visit Monte Carlo updates on visited nodes.
-    :param visited_nodes: List of visited node IDs in the episode.
-    :param total_reward: The total reward obtained in the episode.
+    Perform Monte Carlo updates on the nodes visited in an episode.
+    Each visit is credited with the discounted return that follows it, computed in one backward pass.
+    :param experiences: Sequence of experiences [(node_id, action, reward)] as returned by run_episode.
     :param nodes: Dictionary of all nodes.
     :param alpha: Learning rate for value updates.
+    :param discount_factor: Discount factor (gamma) applied to later rewards.
+    :param every_visit: Update on every visit instead of only the first visit of each node.
+    :return: Largest absolute value change of the update.
     """
+    if not isinstance(nodes, Mapping):
+        raise TypeError("monte_carlo_update takes (experiences, nodes, alpha, ...) with the (node_id, action, reward) "
+                        "experiences returned by run_episode, not (visited_nodes, total_reward, nodes, alpha)")
+
+    # Discounted return following each step, computed backwards
+    returns = [0] * len(experiences)
+    following = 0
+    for step in range(len(experiences) - 1, -1, -1):
+        following = experiences[step][2] + discount_factor * following
+        returns[step] = following
+
     visited_set = set()  # To track first-visit states
-    for node_id in visited_nodes:
-        if node_id not in visited_set:
+    max_change = 0
+    for (node_id, _, _), episode_return in zip(experiences, returns):
+        if every_visit or node_id not in visited_set:
             visited_set.add(node_id)
             node = nodes[node_id]
-            # Update node value using first-visit MC formula
-            node.update_value(node.value + alpha * (total_reward - node.value))
+            # Move the node value towards the return observed from this visit
+            change = alpha * (episode_return - node.value)
+            node.update_value(node.value + change)
+            max_change = max(max_change, abs(change))
+    return max_change
 
 
-def run_experiment(start_node, nodes, episodes=50, alpha=0.1):
+def _report_episode(nodes, episode, total_reward, length, experiences, verbose, log_every, callback):
+    """
+    Emit the callback event and progress output of one finished episode.
+    :param experiences: The episode's experiences, only needed (and only printed) when verbose >= 2.
+    :return: None
+    """
+    if callback is not None:
+        callback({"event": "episode", "episode": episode, "total_reward": total_reward, "length": length})
+
+    # Print episode details
+    if should_report(verbose, 1, episode, log_every):
+        print(f"Episode {episode}:")
+        if verbose >= 2:
+            for node_id, action, reward in experiences:
+                print(f"  Node ({nodes[node_id].state[0]}{nodes[node_id].state[1]} {nodes[node_id].state[2]:>3s}), Action: {action}, Reward: {reward:>2g}")
+        print(f"  Total Reward: {total_reward}")
+        print("-" * 40)
+
+
+def run_experiment(start_node, nodes, episodes=50, alpha=0.1, vectorized=False, seed=None, verbose=0, log_every=1,
+                   callback=None, policy=None, discount_factor=1.0, every_visit=False, monitor=None, max_steps=None,
+                   chunk_size=10000):
     """
     Run the MDP simulation for a specified number of episodes.
     :param start_node: The starting Node object.
     :param nodes: Dictionary of all nodes.
     :param episodes: Number of episodes to simulate.
     :param alpha: Learning rate for Monte Carlo updates.
+    :param vectorized: Simulate the episodes in lockstep chunks with EpisodeSimulator and fold each chunk
+                       into the values with array updates (same result as the sequential updates).
+    :param seed: Seed for the vectorized simulator's random generator.
+    :param verbose: 0 prints nothing, 1 prints each episode's total reward and the average,
+                    2 also prints every experience.
+    :param log_every: Only print every log_every-th episode.
+    :param callback: Optional function called after every episode with an event dictionary
+                     {"event": "episode", "episode", "total_reward", "length"}.
+    :param policy: Optional ExplorationPolicy used to select actions (not supported with vectorized=True).
+    :param discount_factor: Discount factor (gamma) used for the per-visit returns.
+    :param every_visit: Use every-visit instead of first-visit Monte Carlo updates.
+    :param monitor: Optional ConvergenceMonitor recording every episode's (with vectorized=True, every chunk's)
+                    largest value change and visits; its stopping rules can end the experiment early.
+    :param max_steps: Vectorized only: cut episodes off after this many steps (a warning reports how many were
+                      truncated); None runs every episode to a terminal node like the sequential path.
+    :param chunk_size: Vectorized only: number of episodes simulated and recorded together.
+    :return: Average reward per episode.
     """
-    total_rewards = []
-    for episode in range(episodes):
-        # Simulate one episode
-        experiences, total_reward = run_episode(start_node, nodes)
-        total_rewards.append(total_reward)
-
-        # Extract visited node IDs for first-visit Monte Carlo
-        visited_nodes = [node_id for node_id, _, _ in experiences]
-
-        # Perform Monte Carlo update
-        monte_carlo_update(visited_nodes, total_reward, nodes, alpha)
-
-        # Print episode details
-        print(f"Episode {episode + 1}:")
-        for node_id, action, reward in experiences:
-            print(f"  Node ({nodes[node_id].state[0]}{nodes[node_id].state[1]} {nodes[node_id].state[2]:>3s}), Action: {action}, Reward: {reward:>2d}")
-        print(f"  Total Reward: {total_reward}")
-        print("-" * 40)
+    if vectorized:
+        if policy is not None:
+            raise ValueError("Exploration policies are not supported by the vectorized simulator")
+        average_reward = _run_vectorized_experiment(start_node, nodes, episodes, alpha, seed, verbose, log_every,
+                                                    callback, discount_factor, every_visit, monitor, max_steps,
+                                                    chunk_size)
+    else:
+        total_rewards = []
+        for episode in range(episodes):
+            # Simulate one episode
+            experiences, total_reward = run_episode(start_node, nodes, policy)
+            total_rewards.append(total_reward)
+
+            # Perform Monte Carlo update
+            max_change = monte_carlo_update(experiences, nodes, alpha, discount_factor, every_visit)
+            _report_episode(nodes, episode + 1, total_reward, len(experiences), experiences, verbose, log_every,
+                            callback)
+
+            if monitor is not None and monitor.update(max_change, backups=len(experiences)):
+                break
+        average_reward = sum(total_rewards) / len(total_rewards)
+
+    if verbose >= 1:
+        print(f"\nAverage Reward per Episode: {average_reward}")
+    return average_reward
+
 
+def _run_vectorized_experiment(start_node, nodes, episodes, alpha, seed, verbose, log_every, callback,
+                               discount_factor, every_visit, monitor, max_steps, chunk_size):
+    """
+    Vectorized run_experiment: simulate chunks of episodes in lockstep and merge each chunk into a
+    MonteCarloEstimator, so memory only depends on the chunk size.
+    :return: Average reward per episode.
+    """
+    model = compile_model(nodes)
+    simulator = EpisodeSimulator(model)
+    rng = np.random.default_rng(seed)
+    estimator = MonteCarloEstimator(model, discount_factor, every_visit, alpha)
+    estimator.values[:] = model.values_from_nodes(nodes)
+
+    done, total_reward, truncated = 0, 0.0, 0
+    while done < episodes:
+        batch = simulator.run(start_node.id, min(chunk_size, episodes - done), rng=rng, max_steps=max_steps,
+                              record=True)
+        max_change = estimator.update(batch)
+        total_reward += float(batch.returns.sum())
+        truncated += int(batch.truncated.sum())
+
+        if callback is not None or verbose >= 1:
+            for i, (episode_reward, length) in enumerate(zip(batch.returns.tolist(), batch.lengths.tolist())):
+                episode = done + i + 1
+                experiences = batch.experiences(i, model) if should_report(verbose, 2, episode, log_every) else None
+                _report_episode(nodes, episode, episode_reward, length, experiences, verbose, log_every, callback)
+        done += len(batch.lengths)
+
+        if monitor is not None and monitor.update(max_change, backups=int(batch.lengths.sum())):
+            break
+
+    estimator.write_back(nodes)
+    if truncated:
+        warnings.warn(f"{truncated} of {done} episodes were truncated after max_steps={max_steps} steps; "
+                      "their returns and Monte Carlo updates are biased", RuntimeWarning)
+    return total_reward / done
+
+
+def _visit_returns(batch, n_states, discount_factor, every_visit, n_actions=None):
+    """
+    Discounted return of every counted visit in a recorded EpisodeBatch.
+    :param batch: EpisodeBatch simulated with record=True.
+    :param n_states: Number of states in the model.
+    :param discount_factor: Discount factor used to compute the return from each visit.
+    :param every_visit: Keep every visit instead of only the first visit per episode.
+    :param n_actions: When given, visits are keyed by state * n_actions + action instead of by state.
+    :return: Tuple (keys, returns) arrays with one entry per counted visit.
+    """
+    # Discounted return from every step, accumulated backwards over the padded reward matrix
+    returns = np.zeros_like(batch.rewards)
+    following = np.zeros(len(batch.rewards))
+    for step in range(batch.rewards.shape[1] - 1, -1, -1):
+        following = batch.rewards[:, step] + discount_factor * following
+        returns[:, step] = following
+
+    # Flatten the valid steps in (episode, step) order
+    valid = batch.states >= 0
+    keys = batch.states[valid]
+    if n_actions is not None:
+        keys = keys * n_actions + batch.actions[valid]
+    visit_returns = returns[valid]
+    if every_visit:
+        return keys, visit_returns
+
+    # Keep the first occurrence of each (episode, key)
+    episodes = np.nonzero(valid)[0]
+    n_keys = n_states * n_actions if n_actions is not None else n_states
+    _, first = np.unique(episodes * n_keys + keys, return_index=True)
+    return keys[first], visit_returns[first]
+
+
+def return_statistics(batch, n_states, discount_factor=1.0, every_visit=False):
+    """
+    Return statistics of a recorded EpisodeBatch, as mergeable sufficient statistics.
+    :param batch: EpisodeBatch simulated with record=True.
+    :param n_states: Number of states in the model.
+    :param discount_factor: Discount factor used to compute the return from each visit.
+    :param every_visit: Count every visit instead of only the first visit per episode.
+    :return: Tuple (count, sum, sum of squares) arrays indexed by state index.
+    """
+    states, visit_returns = _visit_returns(batch, n_states, discount_factor, every_visit)
+    count = np.bincount(states, minlength=n_states)
+    total = np.bincount(states, weights=visit_returns, minlength=n_states)
+    total_squares = np.bincount(states, weights=visit_returns ** 2, minlength=n_states)
+    return count, total, total_squares
 
 
-    average_reward = sum(total_rewards) / episodes
-    print(f"\nAverage Reward per Episode: {average_reward}")
+class MonteCarloEstimator:
+    def __init__(self, model, discount_factor=1.0, every_visit=False, alpha=None, estimate_q=False):
+        """
+        Array-based Monte Carlo estimator of V(s) (and optionally Q(s, a)) fed with EpisodeBatch results.
+        :param model: Compiled MDPModel the episodes are simulated on.
+        :param discount_factor: Discount factor used for the per-visit returns.
+        :param every_visit: Use every visit instead of only the first visit of each state per episode.
+        :param alpha: None for the running sample mean, or a constant step size.
+        :param estimate_q: Also estimate Q(s, a) from the (state, action) visits.
+        """
+        self.model = model
+        self.discount_factor = discount_factor
+        self.every_visit = every_visit
+        self.alpha = alpha
+        self.counts = np.zeros(model.n_states, dtype=np.int64)
+        self.values = np.zeros(model.n_states)
+        self.q_counts = np.zeros((model.n_states, model.n_actions), dtype=np.int64) if estimate_q else None
+        self.q_values = np.zeros((model.n_states, model.n_actions)) if estimate_q else None
 
+    def _merge(self, estimates, counts, keys, visit_returns):
+        """
+        Fold one batch of visit returns into flat estimate/count arrays.
+        :return: Largest absolute change of an estimate. Updates the arrays in place.
+        """
+        batch_counts = np.bincount(keys, minlength=len(counts))
+        seen = batch_counts > 0
+        previous = estimates[seen]
+        if self.alpha is None:
+            # Running mean: combine the old mean and the batch mean weighted by their counts
+            batch_means = np.bincount(keys, weights=visit_returns, minlength=len(counts))[seen] / batch_counts[seen]
+            total = counts[seen] + batch_counts[seen]
+            estimates[seen] += batch_counts[seen] * (batch_means - estimates[seen]) / total
+        else:
+            # Exact result of n sequential constant-alpha steps in visit order:
+            # V_n = (1 - alpha)^n * V_0 + sum_i alpha * (1 - alpha)^(n - i) * G_i, so later returns weigh more
+            order = np.argsort(keys, kind="stable")
+            sorted_keys = keys[order]
+            rank = np.arange(len(keys)) - (np.cumsum(batch_counts) - batch_counts)[sorted_keys]
+            later_visits = batch_counts[sorted_keys] - 1 - rank
+            weighted = np.bincount(sorted_keys, weights=self.alpha * (1 - self.alpha) ** later_visits
+                                   * visit_returns[order], minlength=len(counts))
+            estimates[seen] = (1 - self.alpha) ** batch_counts[seen] * estimates[seen] + weighted[seen]
+        counts += batch_counts
+        return float(np.abs(estimates[seen] - previous).max()) if seen.any() else 0.0
 
+    def update(self, batch):
+        """
+        Incorporate a batch of recorded episodes.
+        :param batch: EpisodeBatch simulated with record=True on this estimator's model.
+        :return: Largest absolute change of a state value estimate.
+        """
+        keys, visit_returns = _visit_returns(batch, self.model.n_states, self.discount_factor, self.every_visit)
+        max_change = self._merge(self.values, self.counts, keys, visit_returns)
+        if self.q_values is not None:
+            keys, visit_returns = _visit_returns(batch, self.model.n_states, self.discount_factor,
+                                                 self.every_visit, self.model.n_actions)
+            self._merge(self.q_values.reshape(-1), self.q_counts.reshape(-1), keys, visit_returns)
+        return max_change
 
+    def write_back(self, nodes):
+        """
+        Store the estimates of visited states on the nodes (values and, if estimated, Q-values).
+        :param nodes: Dictionary of nodes indexed by their IDs.
+        :return: None
+        """
+        for i in np.flatnonzero(self.counts):
+            node = nodes[self.model.state_ids[i]]
+            node.update_value(float(self.values[i]))
+            if self.q_values is not None:
+                for j in np.flatnonzero(self.q_counts[i]):
+                    node.set_q_value(self.model.actions[j], float(self.q_values[i, j]))
@@ -1,6 +1,140 @@
 import random
+from array import array
+from bisect import bisect_right
+from types import MappingProxyType
+
+import numpy as np
+
+
+class QTable:
+    def __init__(self, actions=(), capacity=0):
+        """
+        Shared, array-backed Q-value storage for many nodes.
+        Q-values live in a single float64 array indexed by (state row, action index).
+        :param actions: Initial action labels (more are added on demand).
+        :param capacity: Number of state rows to preallocate.
+        """
+        self.actions = list(actions)
+        self.action_index = {action: j for j, action in enumerate(self.actions)}
+        self.values = np.zeros((capacity, len(self.actions)))
+        self.initialized = np.zeros((capacity, len(self.actions)), dtype=bool)  # Which entries were ever set
+        self.n_rows = 0
+
+    def add_row(self):
+        """
+        Reserve a row for a new state, doubling the storage when it is full.
+        :return: Row index of the new state.
+        """
+        if self.n_rows == len(self.values):
+            self._resize(max(1, 2 * len(self.values)), len(self.actions))
+        self.n_rows += 1
+        return self.n_rows - 1
+
+    def column(self, action):
+        """
+        Look up (or create) the column of an action.
+        :param action: Action label.
+        :return: Column index.
+        """
+        column = self.action_index.get(action)
+        if column is None:
+            column = len(self.actions)
+            self.actions.append(action)
+            self.action_index[action] = column
+            self._resize(len(self.values), len(self.actions))
+        return column
+
+    def _resize(self, rows, columns):
+        """
+        Grow the value and initialization arrays, keeping their contents.
+        :return: None
+        """
+        values = np.zeros((rows, columns))
+        initialized = np.zeros((rows, columns), dtype=bool)
+        old_rows, old_columns = self.values.shape
+        values[:old_rows, :old_columns] = self.values
+        initialized[:old_rows, :old_columns] = self.initialized
+        self.values, self.initialized = values, initialized
+
+    def attach(self, node):
+        """
+        Move a node's Q-values into this table.
+        :param node: Node to attach.
+        :return: None
+        """
+        existing = dict(node.q_values)
+        node.q_table, node.q_row, node._q_values = self, self.add_row(), None
+        for action, value in existing.items():
+            node.set_q_value(action, value)
+
+    @property
+    def nbytes(self):
+        """
+        Memory used by the Q-value storage.
+        :return: Size of the arrays in bytes.
+        """
+        return self.values.nbytes + self.initialized.nbytes
+
+
+class _TrackedDict(dict):
+    """
+    Dictionary that drops its owner node's successor cache whenever it is modified in place.
+    """
+    __slots__ = ("owner",)
+
+    def __init__(self, owner, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.owner = owner
+
+    def __reduce__(self):
+        # The items are restored before the owner when unpickling, so the owner travels as state
+        return _TrackedDict, (None,), (None, {"owner": self.owner}), None, iter(self.items())
+
+    def _changed(self):
+        if self.owner is not None:  # None while being unpickled
+            self.owner.invalidate_cache()
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self._changed()
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self._changed()
+
+    def __ior__(self, other):
+        super().__ior__(other)
+        self._changed()
+        return self
+
+    def update(self, *args, **kwargs):
+        super().update(*args, **kwargs)
+        self._changed()
+
+    def setdefault(self, key, default=None):
+        value = super().setdefault(key, default)
+        self._changed()
+        return value
+
+    def pop(self, *args):
+        value = super().pop(*args)
+        self._changed()
+        return value
+
+    def popitem(self):
+        item = super().popitem()
+        self._changed()
+        return item
+
+    def clear(self):
+        super().clear()
+        self._changed()
+
 
 class Node:
+    __slots__ = ("id", "state", "_transitions", "_rewards", "value", "policy", "is_terminal_state", "q_table", "q_row",
+                 "_q_values", "_actions", "_successors")
+
     def __init__(self, id, state, transitions=None, rewards=None, is_terminal=False):
         """
         Node constructor for MDP representation.
@@ -12,13 +146,77 @@ class Node:
         """
         self.id = id
         self.state = state
+        self._actions = None # Cached list of actions (built lazily from transitions)
+        self._successors = None # Cached {action: (next_ids, cumulative_probs, rewards)}
         self.transitions = transitions or {}
         self.rewards = rewards or {}
         self.value = 0  # Initialize value to 0
         self.policy = None # Store the optimal policy (action)
-        self.q_values = {} # Initialize Q-values dictionary
+        self.q_table = None # Shared QTable holding this node's Q-values (see QTable.attach)
+        self.q_row = None # Row of this node in the QTable
+        self._q_values = None # Plain {action: Q-value} dictionary used until the node is attached to a QTable
         self.is_terminal_state = is_terminal  # Flag to indicate if this node is terminal
 
+    @property
+    def transitions(self):
+        """
+        Transition probabilities keyed by (current_node, action, next_node).
+        Stored as a copy that refreshes the successor cache when edited in place.
+        """
+        return self._transitions
+
+    @transitions.setter
+    def transitions(self, transitions):
+        self._transitions = _TrackedDict(self, transitions)
+        self.invalidate_cache()
+
+    @property
+    def rewards(self):
+        """
+        Rewards keyed by (current_node, action, next_node).
+        Stored as a copy that refreshes the successor cache when edited in place.
+        """
+        return self._rewards
+
+    @rewards.setter
+    def rewards(self, rewards):
+        self._rewards = _TrackedDict(self, rewards)
+        self.invalidate_cache()
+
+    def invalidate_cache(self):
+        """
+        Drop the cached action and successor lists so they are rebuilt from transitions/rewards on next use.
+        :return: None
+        """
+        self._actions = None
+        self._successors = None
+
+    def _build_cache(self):
+        """
+        Group the transitions by action once: per action, the successor IDs, their cumulative probabilities
+        (for bisect sampling; the probabilities are their differences) and rewards. The IDs and rewards are
+        tuples of the objects already held by the dictionaries and the cumulative probabilities a packed
+        array('d'), to keep the per-node overhead small.
+        :return: None
+        """
+        rewards = self._rewards
+        grouped = {}
+        for key, prob in self._transitions.items():
+            grouped.setdefault(key[1], []).append((key[2], prob, rewards.get(key, 0)))
+
+        successors = {}
+        for action, entries in grouped.items():
+            cumulative = array('d')
+            cumulative_prob = 0
+            for _, prob, _ in entries:
+                cumulative_prob += prob
+                cumulative.append(cumulative_prob)
+            successors[action] = (tuple(entry[0] for entry in entries), cumulative,
+                                  tuple(entry[2] for entry in entries))
+
+        self._successors = successors
+        self._actions = list(successors)
+
     def update_value(self, new_value):
         """
         Updates the value of the node.
@@ -30,19 +228,28 @@ class Node:
     def get_possible_actions(self):
         """
         Extract unique actions from the transitions dictionary
-        :return: list of unique actions available from this state
+        :return: list of unique actions available from this state (cached, do not modify)
         """
-        actions = {key[1] for key in self.transitions.keys()}
-        return list(actions)
+        if self._actions is None:
+            self._build_cache()
+        return self._actions
 
     def select_action(self):
         """
         Randomly select an action with equal probability among possible actions.
         :return: Selected action.
         """
-        # Extract unique actions available from the transitions
-        actions = {key[1] for key in self.transitions.keys() if key[0] == self.id}
-        return random.choice(list(actions))
+        return random.choice(self.get_possible_actions())
+
+    def get_successors(self, action):
+        """
+        Cached successors of an action.
+        :param action: The chosen action.
+        :return: Tuple (next_ids, cumulative_probs, rewards) of parallel sequences.
+        """
+        if self._successors is None:
+            self._build_cache()
+        return self._successors.get(action, ((), array('d'), ()))
 
     def get_next_node(self, action):
         """
@@ -50,15 +257,10 @@ class Node:
         :param action: The chosen action.
         :return: The ID of the next node.
         """
-        # Filter transitions relevant to the current node and action
-        relevant_transitions = {(key[2], prob) for key, prob in self.transitions.items() if key[0] == self.id and key[1] == action}
-        rand = random.random()
-        cumulative_prob = 0
-        for next_node, prob in relevant_transitions:
-            cumulative_prob += prob
-            if rand < cumulative_prob:
-                return next_node
-        return next_node  # Default to the last node if cumulative probabilities don't match
+        next_ids, cumulative, _ = self.get_successors(action)
+        # Binary search on the cumulative probabilities; default to the last node if they don't sum to 1
+        index = bisect_right(cumulative, random.random())
+        return next_ids[min(index, len(next_ids) - 1)]
 
     def get_next_state_value(self, action, nodes, discount_factor):
         """
@@ -69,21 +271,17 @@ class Node:
         """
         total_value = 0
 
-        # Iterate through transitions to find relevant (current_state, action, next_state) tuples
-        for (current_state, act, next_state), prob in self.transitions.items():
-            if act == action:
-                # Get the reward for this transition
-                if (current_state, action, next_state) in self.rewards:
-                    reward = self.rewards[(current_state, action, next_state)]
-                else:
-                    reward = 0 # Default reward if not found
+        next_ids, cumulative, rewards = self.get_successors(action)
+        previous = 0
+        for next_state, cumulative_prob, reward in zip(next_ids, cumulative, rewards):
+            prob = cumulative_prob - previous
+            previous = cumulative_prob
+            # Get the value of the next state, default to 0 if the next state is not found
+            next_state_value = nodes[next_state].value if next_state in nodes else 0
 
-                # Get the value of the next state, default to 0 if the next state is not found
-                next_state_value = nodes[next_state].value if next_state in nodes else 0
-
-                # Update total value based on Bellman equation
-                if prob > 0:
-                    total_value += prob * (reward + discount_factor * next_state_value)  # Using discount factor 0.99
+            # Update total value based on Bellman equation
+            if prob > 0:
+                total_value += prob * (reward + discount_factor * next_state_value)
 
         return total_value
 
@@ -95,13 +293,32 @@ class Node:
         return self.is_terminal_state
 
     # Q-learning specific methods:
+    @property
+    def q_values(self):
+        """
+        Read-only view of the Q-values that have been set for this node (use set_q_value to change them).
+        :return: Mapping from actions to Q-values.
+        """
+        table = self.q_table
+        if table is None:
+            return MappingProxyType(self._q_values if self._q_values is not None else {})
+        row = self.q_row
+        return MappingProxyType({action: float(table.values[row, j]) for j, action in enumerate(table.actions)
+                                 if table.initialized[row, j]})
+
     def q_value(self, action):
         """
         Retrieve the Q-value for a given state-action pair.
         :param action: The action for which to get the Q-value.
         :return: The Q-value for the (state, action) pair. Defaults to 0 if the action is not initialized.
         """
-        return self.q_values.get(action, 0)  # Returns 0 if action is not found in q_values
+        table = self.q_table
+        if table is None:
+            return self._q_values.get(action, 0) if self._q_values is not None else 0
+        column = table.action_index.get(action)
+        if column is None:
+            return 0  # Returns 0 if the action has no Q-value yet
+        return table.values[self.q_row, column]
 
     def set_q_value(self, action, value):
         """
@@ -110,8 +327,12 @@ class Node:
         :param value: The new Q-value to assign to the (state, action) pair.
         :return: None
         """
-        self.q_values[action] = value
-
-
-
-
+        if self.q_table is None:
+            # Standalone nodes keep a plain dictionary; QTable.attach moves it into a shared table
+            if self._q_values is None:
+                self._q_values = {}
+            self._q_values[action] = value
+            return
+        column = self.q_table.column(action)
+        self.q_table.values[self.q_row, column] = value
+        self.q_table.initialized[self.q_row, column] = True
@@ -0,0 +1,282 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from src.model import compile_model
+from src.monte_carlo import return_statistics
+from src.simulator import EpisodeSimulator
+from src.value_iteration import _block_backup
+
+# Per-process state, set once by the pool initializer so the model is not pickled with every task
+_worker_model = None
+_worker_simulator = None
+_worker_memory = []  # SharedMemory handles of the value buffers, kept open for the worker's lifetime
+_worker_values = []  # NumPy views onto the shared value buffers
+
+
+def _init_worker(model):
+    """
+    Pool initializer: keep the compiled model and its simulator in the worker process.
+    :param model: Compiled MDPModel.
+    :return: None
+    """
+    global _worker_model, _worker_simulator
+    _worker_model = model
+    _worker_simulator = EpisodeSimulator(model)
+
+
+def _split(total, shards):
+    """
+    Split a number of episodes into near-equal shard sizes.
+    :return: List of shard sizes summing to total.
+    """
+    base, extra = divmod(total, shards)
+    return [base + (1 if i < extra else 0) for i in range(shards)]
+
+
+def _run_shards(model, function, tasks, processes):
+    """
+    Run one task per shard on a process pool (or inline for a single process).
+    :return: List of results in shard order.
+    """
+    if processes == 1:
+        _init_worker(model)
+        return [function(*task) for task in tasks]
+    with ProcessPoolExecutor(max_workers=processes, initializer=_init_worker, initargs=(model,)) as pool:
+        return list(pool.map(function, *zip(*tasks)))
+
+
+def _monte_carlo_shard(start_index, episodes, seed, policy, discount_factor, batch_size):
+    """
+    Simulate one shard of episodes and reduce them to first-visit return statistics.
+    :return: Tuple (count, sum, sum of squares, sum of episode returns).
+    """
+    rng = np.random.default_rng(seed)
+    n_states = _worker_model.n_states
+    count, total, total_squares = np.zeros(n_states, dtype=np.int64), np.zeros(n_states), np.zeros(n_states)
+    episode_return_sum = 0.0
+    for size in _split(episodes, max(1, -(-episodes // batch_size))):
+        batch = _worker_simulator.run(np.full(size, start_index), size, policy=policy, rng=rng,
+                                      discount_factor=discount_factor, record=True)
+        batch_count, batch_total, batch_squares = return_statistics(batch, n_states, discount_factor)
+        count += batch_count
+        total += batch_total
+        total_squares += batch_squares
+        episode_return_sum += batch.returns.sum()
+    return count, total, total_squares, episode_return_sum
+
+
+def parallel_monte_carlo(nodes, start_node, episodes=100000, processes=None, seed=None, policy=None,
+                         discount_factor=1.0, batch_size=10000):
+    """
+    First-visit Monte Carlo value estimation with episodes sharded across a process pool.
+    Each shard gets its own random stream spawned from the master seed, so results only depend
+    on the seed and the number of processes, not on scheduling.
+    :param nodes: Dictionary of nodes (states) indexed by their IDs.
+    :param start_node: The starting Node object.
+    :param episodes: Total number of episodes to simulate.
+    :param processes: Number of worker processes (defaults to os.cpu_count()).
+    :param seed: Master seed for numpy.random.SeedSequence.
+    :param policy: None for the uniform random policy, or an array of action indices per state.
+    :param discount_factor: Discount factor used to compute returns.
+    :param batch_size: Episodes simulated together inside a shard.
+    :return: Dictionary with "values", "counts" and "std_errors" arrays (indexed like the compiled model)
+             and "average_reward". Node values of visited nodes are updated in place.
+    """
+    processes = processes or os.cpu_count() or 1
+    model = compile_model(nodes)
+    seeds = np.random.SeedSequence(seed).spawn(processes)
+    start_index = model.state_index[start_node.id]
+    tasks = [(start_index, size, shard_seed, policy, discount_factor, batch_size)
+             for size, shard_seed in zip(_split(episodes, processes), seeds)]
+
+    # Merge the shards by adding their sufficient statistics
+    results = _run_shards(model, _monte_carlo_shard, tasks, processes)
+    count, total, total_squares, episode_return_sum = (sum(parts) for parts in zip(*results))
+
+    visited = count > 0
+    values = np.where(visited, total / np.maximum(count, 1), model.values_from_nodes(nodes))
+    variance = np.where(count > 1, (total_squares - count * values ** 2) / np.maximum(count - 1, 1), 0.0)
+    std_errors = np.sqrt(np.maximum(variance, 0.0) / np.maximum(count, 1))
+
+    for i in np.flatnonzero(visited):
+        nodes[model.state_ids[i]].update_value(float(values[i]))
+
+    return {
+        "values": values,
+        "counts": count,
+        "std_errors": std_errors,
+        "average_reward": episode_return_sum / episodes,
+    }
+
+
+def _q_learning_shard(q_table, episodes, first_episode, seed, alpha, gamma):
+    """
+    Run tabular Q-learning episodes (uniform random behavior policy) on a private copy of the Q-table.
+    Trajectories are simulated in one batch since the behavior policy does not depend on Q.
+    :return: Tuple (Q-table, visit counts, max Q-value change).
+    """
+    model = _worker_model
+    rng = np.random.default_rng(seed)
+    max_change = 0.0
+
+    starts = rng.integers(model.n_states, size=episodes)
+    batch = _worker_simulator.run(starts, episodes, rng=rng, record=True)
+
+    available = [np.flatnonzero(mask).tolist() for mask in model.action_mask]
+    q_rows = q_table.tolist()
+    visits = [[0] * model.n_actions for _ in range(model.n_states)]
+    for episode in range(episodes):
+        episode_alpha = alpha * 0.995 ** (first_episode + episode)
+        length = batch.lengths[episode]
+        for state, action, reward, next_state in zip(batch.states[episode, :length].tolist(),
+                                                     batch.actions[episode, :length].tolist(),
+                                                     batch.rewards[episode, :length].tolist(),
+                                                     batch.next_states[episode, :length].tolist()):
+            next_q = q_rows[next_state]
+            max_next_q = max((next_q[a] for a in available[next_state]), default=0)
+            old_q_value = q_rows[state][action]
+            new_q_value = old_q_value + episode_alpha * (reward + gamma * max_next_q - old_q_value)
+            q_rows[state][action] = new_q_value
+            visits[state][action] += 1
+            max_change = max(max_change, abs(new_q_value - old_q_value))
+    return (np.array(q_rows, dtype=np.float64).reshape(q_table.shape),
+            np.array(visits, dtype=np.int64).reshape(q_table.shape), max_change)
+
+
+def parallel_q_learning(nodes, episodes=1000, processes=None, seed=None, alpha=0.2, gamma=0.99, threshold=0.001,
+                        sync_every=None):
+    """
+    Q-learning with episodes sharded across a process pool and deterministic per-shard seeding.
+    Each synchronization round, every worker continues from the shared Q-table on its own random
+    stream; the resulting tables are merged by averaging weighted by state-action visit counts.
+    :param nodes: Dictionary of nodes (states) indexed by their IDs.
+    :param episodes: Total number of episodes across all workers.
+    :param processes: Number of worker processes (defaults to os.cpu_count()).
+    :param seed: Master seed for numpy.random.SeedSequence.
+    :param alpha: Learning rate (decayed by 0.995 per episode within each worker).
+    :param gamma: Discount factor.
+    :param threshold: Stop after a round whose largest Q-value change is below this value.
+    :param sync_every: Episodes per worker between synchronizations; None merges only once at the end.
+    :return: None. Updates Q-values and policies in place.
+    """
+    processes = processes or os.cpu_count() or 1
+    model = compile_model(nodes)
+    q_table = np.zeros((model.n_states, model.n_actions))
+    for i, state_id in enumerate(model.state_ids):
+        node = nodes[state_id]
+        for j, action in enumerate(model.actions):
+            q_table[i, j] = node.q_value(action)
+
+    per_worker = -(-episodes // processes)
+    sync_every = sync_every or per_worker
+    master = np.random.SeedSequence(seed)
+    done = 0
+
+    while done < per_worker:
+        round_episodes = min(sync_every, per_worker - done)
+        seeds = master.spawn(processes)
+        tasks = [(q_table, round_episodes, done, shard_seed, alpha, gamma) for shard_seed in seeds]
+        results = _run_shards(model, _q_learning_shard, tasks, processes)
+        done += round_episodes
+
+        # Visit-weighted average; pairs nobody visited keep their shared value
+        visits = sum(result[1] for result in results)
+        weighted = sum(result[0] * result[1] for result in results)
+        q_table = np.where(visits > 0, weighted / np.maximum(visits, 1), q_table)
+        if max(result[2] for result in results) <= threshold:
+            break
+
+    # Write the merged Q-values and greedy policies back to the nodes
+    for i, state_id in enumerate(model.state_ids):
+        node = nodes[state_id]
+        available = np.flatnonzero(model.action_mask[i])
+        for j in available:
+            node.set_q_value(model.actions[j], float(q_table[i, j]))
+        if len(available):
+            node.policy = model.actions[available[np.argmax(q_table[i, available])]]
+
+
+def _init_value_worker(model, buffer_names):
+    """
+    Pool initializer for parallel value iteration: keep the model and attach the shared value buffers.
+    :param model: Compiled MDPModel.
+    :param buffer_names: Names of the SharedMemory blocks holding the value vectors.
+    :return: None
+    """
+    global _worker_model, _worker_memory, _worker_values
+    _worker_model = model
+    _worker_memory = [shared_memory.SharedMemory(name=name) for name in buffer_names]
+    _worker_values = [np.ndarray(model.n_states, dtype=np.float64, buffer=memory.buf) for memory in _worker_memory]
+
+
+def _value_partition_sweep(low, high, source, target, discount_factor):
+    """
+    Back up the states [low, high) reading the shared buffer source and writing the shared buffer target
+    (the same buffer in asynchronous mode).
+    :return: Largest absolute value change in the partition.
+    """
+    values = _worker_values[source]
+    new_values, _ = _block_backup(_worker_model, values, low, high, discount_factor)
+    max_change = float(np.max(np.abs(new_values - values[low:high]), initial=0.0))
+    _worker_values[target][low:high] = new_values
+    return max_change
+
+
+def parallel_value_iteration(nodes, threshold=0.001, discount_factor=0.99, processes=None, mode="jacobi",
+                             max_iterations=None):
+    """
+    Value iteration with the states partitioned across a process pool.
+    The value vector lives in multiprocessing shared memory, so workers read and write it without copies;
+    each task backs up one contiguous partition of states.
+    :param nodes: Dictionary of nodes (states) indexed by their IDs.
+    :param threshold: Convergence threshold on the largest value change of a sweep.
+    :param discount_factor: Discount factor (gamma) for future rewards.
+    :param processes: Number of worker processes (defaults to os.cpu_count()).
+    :param mode: "jacobi" reads the previous sweep's buffer and writes a second one, synchronizing after every sweep;
+                 "async" updates a single shared buffer in place, so partitions see each other's newest values.
+    :param max_iterations: Optional cap on the number of sweeps.
+    :return: Dictionary with "iterations" and "max_change". Updates node values and policies in place.
+    """
+    if mode not in ("jacobi", "async"):
+        raise ValueError(f"Unknown parallel value iteration mode: {mode!r}")
+    processes = processes or os.cpu_count() or 1
+    model = compile_model(nodes)
+    n_states = model.n_states
+    initial_values = model.values_from_nodes(nodes)
+
+    bounds = np.cumsum([0] + _split(n_states, min(processes, max(n_states, 1)))).tolist()
+    partitions = [(low, high) for low, high in zip(bounds[:-1], bounds[1:]) if high > low]
+
+    buffers = [shared_memory.SharedMemory(create=True, size=max(initial_values.nbytes, 1))
+               for _ in range(2 if mode == "jacobi" else 1)]
+    try:
+        for memory in buffers:
+            np.ndarray(n_states, dtype=np.float64, buffer=memory.buf)[:] = initial_values
+        names = [memory.name for memory in buffers]
+
+        iterations = 0
+        max_change = float('inf')
+        with ProcessPoolExecutor(max_workers=processes, initializer=_init_value_worker,
+                                 initargs=(model, names)) as pool:
+            source = 0
+            while max_change > threshold and (max_iterations is None or iterations < max_iterations):
+                iterations += 1
+                target = 1 - source if mode == "jacobi" else source
+                tasks = [(low, high, source, target, discount_factor) for low, high in partitions]
+                # Waiting for every partition is the per-sweep synchronization point
+                max_change = max(pool.map(_value_partition_sweep, *zip(*tasks)), default=0.0)
+                source = target
+
+        values = np.ndarray(n_states, dtype=np.float64, buffer=buffers[source].buf).copy()
+    finally:
+        for memory in buffers:
+            memory.close()
+            memory.unlink()
+
+    # Greedy policy with respect to the final values, as value_iteration records it
+    _, policy = model.greedy(values, discount_factor)
+    model.write_back(nodes, values, policy)
+    return {"iterations": iterations, "max_change": max_change}
@@ -0,0 +1,123 @@
+import numpy as np
+
+from src.model import compile_model
+
+try:
+    from scipy import sparse
+    from scipy.sparse import linalg as sparse_linalg
+except ImportError:  # SciPy is optional; fall back to batched dense NumPy solves
+    sparse = None
+    sparse_linalg = None
+
+
+def policy_indices(model, policies):
+    """
+    Translate K policies given as action labels into a (K, n_states) array of action indices.
+    :param model: Compiled MDPModel.
+    :param policies: Sequence of K policies, each a sequence of actions ordered like model.state_ids
+                     or a dictionary {node ID: action}; None (or a missing entry) means no action.
+    :return: (K, n_states) integer array, -1 where the policy takes no action.
+    """
+    indices = np.full((len(policies), model.n_states), -1, dtype=np.int64)
+    for k, policy in enumerate(policies):
+        actions = [policy.get(state_id) for state_id in model.state_ids] if isinstance(policy, dict) else policy
+        if len(actions) != model.n_states:
+            raise ValueError(f"Policy {k} has {len(actions)} actions for {model.n_states} states")
+        for i, action in enumerate(actions):
+            if action is None:
+                continue
+            j = model.action_index.get(action)
+            if j is None or not model.action_mask[i, j]:
+                raise ValueError(f"Policy {k} takes unavailable action {action!r} in state {model.state_ids[i]!r}")
+            indices[k, i] = j
+    return indices
+
+
+def _stacked_transitions(model, policies):
+    """
+    Gather the stored transitions followed by all K policies at once.
+    Entries are keyed by the flat index k * n_states + s of the (policy, state) pair they belong to.
+    :return: Tuple (owners, next_owners, probs, rewards) with next_owners = k * n_states + s'.
+    """
+    n_states = model.n_states
+    flat = np.flatnonzero(policies.ravel() >= 0)
+    rows = (flat % n_states) * model.n_actions + policies.ravel()[flat]
+    starts = model.indptr[rows]
+    lengths = model.indptr[rows + 1] - starts
+    owners = np.repeat(flat, lengths)
+    # Position of every entry: its row's start plus its offset within the row
+    entries = np.repeat(starts - (np.cumsum(lengths) - lengths), lengths) + np.arange(lengths.sum())
+    next_owners = owners - owners % n_states + model.indices[entries]
+    return owners, next_owners, model.probs[entries], model.rewards[entries]
+
+
+def solve_policy_evaluation(model, policies, discount_factor=0.99, method="exact", threshold=0.001,
+                            initial_values=None, max_iterations=None):
+    """
+    Evaluate K deterministic policies simultaneously: V_k = R_k + gamma * P_k V_k for every k.
+    :param model: Compiled MDPModel (see src.model.compile_model).
+    :param policies: (K, n_states) array of action indices, -1 meaning no action.
+    :param discount_factor: Discount factor (gamma) for future rewards.
+    :param method: "exact" solves all K linear systems together (one block-diagonal sparse solve with SciPy,
+                   a batched dense solve without it); "iterative" applies stacked matrix-vector products
+                   until the largest value change is at or below the threshold.
+    :param threshold: Convergence threshold for the iterative method.
+    :param initial_values: Optional values per state, kept by states without an action and used as the
+                           iterative starting point; zeros by default.
+    :param max_iterations: Optional cap on the iterative sweeps.
+    :return: (K, n_states) array of state values.
+    """
+    policies = np.asarray(policies, dtype=np.int64).reshape(-1, model.n_states)
+    n_policies, n_states = policies.shape
+    if initial_values is None:
+        initial_values = np.zeros(n_states)
+    values = np.tile(np.asarray(initial_values, dtype=np.float64), n_policies)
+
+    owners, next_owners, probs, rewards = _stacked_transitions(model, policies)
+    acting = policies.ravel() >= 0
+    expected_rewards = np.bincount(owners, weights=probs * rewards, minlength=n_policies * n_states)
+
+    if method == "exact":
+        # Identity rows for states without an action keep their initial value
+        b = np.where(acting, expected_rewards, values)
+        if sparse is not None:
+            diagonal = np.arange(n_policies * n_states)
+            A = sparse.csr_matrix((np.concatenate((np.ones(len(diagonal)), -discount_factor * probs)),
+                                   (np.concatenate((diagonal, owners)), np.concatenate((diagonal, next_owners)))),
+                                  shape=(len(diagonal),) * 2)
+            values = sparse_linalg.spsolve(A.tocsc(), b)
+        else:
+            A = np.zeros((n_policies, n_states, n_states))
+            A[:, np.arange(n_states), np.arange(n_states)] = 1.0
+            np.add.at(A, (owners // n_states, owners % n_states, next_owners % n_states), -discount_factor * probs)
+            values = np.linalg.solve(A, b.reshape(n_policies, n_states, 1))
+    elif method == "iterative":
+        iterations = 0
+        max_change = float('inf')
+        while max_change > threshold and (max_iterations is None or iterations < max_iterations):
+            iterations += 1
+            expected_next = np.bincount(owners, weights=probs * values[next_owners], minlength=len(values))
+            new_values = np.where(acting, expected_rewards + discount_factor * expected_next, values)
+            max_change = float(np.max(np.abs(new_values - values), initial=0.0))
+            values = new_values
+    else:
+        raise ValueError(f"Unknown policy evaluation method: {method!r}")
+
+    return np.asarray(values).reshape(n_policies, n_states)
+
+
+def evaluate_policies(nodes, policies, discount_factor=0.99, method="exact", threshold=0.001):
+    """
+    Evaluate K candidate policies over the nodes in one vectorized call (see solve_policy_evaluation).
+    Unlike value_iteration this does not optimize; it returns the value of following each policy.
+    :param nodes: Dictionary of nodes (states) indexed by their IDs.
+    :param policies: Sequence of K policies, each a sequence of actions in the order of nodes
+                     or a dictionary {node ID: action}; None means no action (the node keeps its value).
+    :param discount_factor: Discount factor (gamma) for future rewards.
+    :param method: "exact" (batched linear solve) or "iterative" (stacked matrix-vector products).
+    :param threshold: Convergence threshold for the iterative method.
+    :return: (K, number of nodes) array of values, columns in the order of nodes.
+    """
+    model = compile_model(nodes)
+    return solve_policy_evaluation(model, policy_indices(model, policies), discount_factor=discount_factor,
+                                   method=method, threshold=threshold, initial_values=model.values_from_nodes(nodes))
@@ -0,0 +1,171 @@
+import time
+
+import numpy as np
+
+from src.model import compile_model
+
+try:
+    from scipy import sparse
+    from scipy.sparse import linalg as sparse_linalg
+except ImportError:  # SciPy is optional; fall back to dense NumPy solves
+    sparse = None
+    sparse_linalg = None
+
+
+def policy_transitions(model, policy):
+    """
+    Select the stored transitions that a deterministic policy follows.
+    :param model: Compiled MDPModel.
+    :param policy: Array of action indices per state, -1 meaning no action.
+    :return: Tuple (states, next_states, probs, rewards) restricted to the policy's (state, action) rows.
+    """
+    chosen_rows = np.zeros(model.n_states * model.n_actions, dtype=bool)
+    acting = np.flatnonzero(policy >= 0)
+    chosen_rows[acting * model.n_actions + policy[acting]] = True
+    selected = chosen_rows[model.row]
+    return (model.row[selected] // model.n_actions, model.indices[selected],
+            model.probs[selected], model.rewards[selected])
+
+
+def _evaluation_system(model, policy, values, discount_factor):
+    """
+    Build the linear system (I - gamma * P_pi) V = R_pi for a fixed policy.
+    States without an action keep their current value (identity row, right-hand side = value).
+    :return: Tuple (A, b) with A a SciPy CSR matrix (or a dense array without SciPy) and b a vector.
+    """
+    states, next_states, probs, rewards = policy_transitions(model, policy)
+    acting = policy >= 0
+    b = np.where(acting, np.bincount(states, weights=probs * rewards, minlength=model.n_states), values)
+
+    rows = np.concatenate((np.arange(model.n_states), states))
+    cols = np.concatenate((np.arange(model.n_states), next_states))
+    data = np.concatenate((np.ones(model.n_states), -discount_factor * probs))
+    if sparse is None:
+        A = np.zeros((model.n_states, model.n_states))
+        np.add.at(A, (rows, cols), data)
+        return A, b
+    return sparse.csr_matrix((data, (rows, cols)), shape=(model.n_states, model.n_states)), b
+
+
+def _solve(A, b, x0, linear_solver, tolerance):
+    """
+    Solve the policy evaluation system with the requested method.
+    :return: Solution vector.
+    """
+    if sparse is None:
+        return np.linalg.solve(A, b)
+    if linear_solver == "direct":
+        return sparse_linalg.spsolve(A.tocsc(), b)
+    if linear_solver in ("gmres", "bicgstab"):
+        method = getattr(sparse_linalg, linear_solver)
+        try:
+            solution, info = method(A, b, x0=x0, rtol=tolerance, atol=tolerance)
+        except TypeError:  # SciPy < 1.12 names the relative tolerance "tol"
+            solution, info = method(A, b, x0=x0, tol=tolerance, atol=tolerance)
+        if info < 0:
+            raise RuntimeError(f"{linear_solver} failed to evaluate the policy (info={info})")
+        return solution
+    raise ValueError(f"Unknown linear solver: {linear_solver!r}")
+
+
+def _partial_evaluation(model, policy, values, discount_factor, sweeps):
+    """
+    Apply k sweeps of V <- R_pi + gamma * P_pi V (modified policy iteration).
+    :return: Updated values array.
+    """
+    states, next_states, probs, rewards = policy_transitions(model, policy)
+    acting = policy >= 0
+    for _ in range(sweeps):
+        backed_up = np.bincount(states, weights=probs * (rewards + discount_factor * values[next_states]),
+                                minlength=model.n_states)
+        values = np.where(acting, backed_up, values)
+    return values
+
+
+def _improve(model, values, policy, discount_factor):
+    """
+    Greedy policy improvement that keeps the current action on ties, so the loop cannot oscillate.
+    :return: Tuple (new policy, backed-up values).
+    """
+    if model.n_actions == 0:
+        return policy, values
+    q = model.q_values(values, discount_factor)
+    best = q.max(axis=1, initial=-np.inf)
+    acting = model.has_actions
+    current = q[np.arange(model.n_states), np.maximum(policy, 0)]
+    keep = (policy >= 0) & (current >= best - 1e-12 * np.maximum(1.0, np.abs(best)))
+    new_policy = np.where(keep, policy, np.where(acting, q.argmax(axis=1), -1))
+    return new_policy, np.where(acting, best, values)
+
+
+def solve_policy_iteration(model, discount_factor=0.99, threshold=0.001, evaluation_sweeps=None,
+                           linear_solver="direct", initial_values=None, max_iterations=1000):
+    """
+    Policy iteration on a compiled MDPModel.
+    :param model: Compiled MDPModel (see src.model.compile_model).
+    :param discount_factor: Discount factor (gamma) for future rewards.
+    :param threshold: Stopping criteria for the Bellman residual in modified policy iteration
+                      (and the tolerance of the iterative linear solvers).
+    :param evaluation_sweeps: None for exact evaluation via a linear solve, or k for modified
+                              policy iteration with k partial evaluation sweeps per improvement.
+    :param linear_solver: "direct" (sparse LU), "gmres" or "bicgstab" for exact evaluation.
+    :param initial_values: Optional starting values; zeros by default.
+    :param max_iterations: Maximum number of policy improvement steps.
+    :return: Tuple (values, policy, stats) with policy as action indices (-1 for no action) and stats a dict
+             with "iterations", "max_change" and "time".
+    """
+    start_time = time.perf_counter()
+    if initial_values is None:
+        values = np.zeros(model.n_states)
+    else:
+        values = np.array(initial_values, dtype=np.float64)
+
+    # Start from the greedy policy with respect to the initial values
+    policy = np.full(model.n_states, -1, dtype=np.int64)
+    policy, _ = _improve(model, values, policy, discount_factor)
+
+    iterations = 0
+    max_change = float('inf')
+    while iterations < max_iterations:
+        iterations += 1
+
+        # Policy evaluation
+        if evaluation_sweeps is None:
+            A, b = _evaluation_system(model, policy, values, discount_factor)
+            values = _solve(A, b, values, linear_solver, threshold)
+        else:
+            values = _partial_evaluation(model, policy, values, discount_factor, evaluation_sweeps)
+
+        # Policy improvement
+        new_policy, backed_up = _improve(model, values, policy, discount_factor)
+        max_change = float(np.max(np.abs(backed_up - values), initial=0.0))
+        policy_stable = np.array_equal(new_policy, policy)
+        policy = new_policy
+
+        if policy_stable and (evaluation_sweeps is None or max_change <= threshold):
+            break
+
+    stats = {
+        "iterations": iterations,
+        "max_change": max_change,
+        "time": time.perf_counter() - start_time,
+    }
+    return values, policy, stats
+
+
+def policy_iteration(nodes, threshold=0.001, discount_factor=0.99, evaluation_sweeps=None, linear_solver="direct"):
+    """
+    Performs policy iteration to find the optimal policy. Drop-in alternative to value_iteration
+    that needs far fewer iterations when the discount factor is close to 1.
+    :param nodes: Dictionary of nodes (states) indexed by their IDs.
+    :param threshold: Stopping criteria for the Bellman residual (modified policy iteration).
+    :param discount_factor: Discount factor (gamma) for future rewards.
+    :param evaluation_sweeps: None for exact evaluation, or k for modified policy iteration.
+    :param linear_solver: "direct", "gmres" or "bicgstab" for exact evaluation.
+    :return: None. Updates node values and policies in place.
+    """
+    model = compile_model(nodes)
+    values, policy, _ = solve_policy_iteration(model, discount_factor=discount_factor, threshold=threshold,
+                                               evaluation_sweeps=evaluation_sweeps, linear_solver=linear_solver,
+                                               initial_values=model.values_from_nodes(nodes))
+    model.write_back(nodes, values, policy)
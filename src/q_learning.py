@@ -1,6 +1,30 @@
 import random
 
-def q_learning(nodes, episodes=1000, alpha=0.2, gamma=0.99, threshold=0.001):
+from src.replay import batched_q_update, shared_q_table
+from src.reporting import should_report
+
+
+def _greedy_changes(nodes, greedy):
+    """
+    Count the nodes whose greedy action differs from the one recorded in greedy, updating the record.
+    :param nodes: Iterable of nodes to check.
+    :param greedy: Dictionary mapping node IDs to their last greedy action.
+    :return: Number of changed greedy actions.
+    """
+    changes = 0
+    for node in nodes:
+        possible_actions = node.get_possible_actions()
+        if not possible_actions:
+            continue
+        best_action = max(possible_actions, key=node.q_value)
+        if greedy.get(node.id) != best_action:
+            greedy[node.id] = best_action
+            changes += 1
+    return changes
+
+
+def q_learning(nodes, episodes=1000, alpha=0.2, gamma=0.99, threshold=0.001, verbose=0, log_every=1, callback=None,
+               replay_buffer=None, batch_size=32, exploration=None, monitor=None):
     """
     Performs Q-learning to find the optimal policy.
     :param nodes: Dictionary of nodes (states) indexed by their IDs.
@@ -8,25 +32,48 @@ def q_learning(nodes, episodes=1000, alpha=0.2, gamma=0.99, threshold=0.001):
     :param alpha: Learning rate.
     :param gamma: Discount factor.
     :param threshold: Stopping criteria for the maximum Q-value change.
+    :param verbose: 0 prints nothing, 1 prints one line per episode and the final Q-values/policies,
+                    2 also prints every step.
+    :param log_every: Only print every log_every-th episode.
+    :param callback: Optional function called after every episode with an event dictionary
+                     {"event": "episode", "episode", "max_change", "total_reward", "alpha"}.
+    :param replay_buffer: Optional ReplayBuffer. When given, every step is stored in it and the Q-table is
+                          updated with a vectorized minibatch of batch_size transitions sampled from it.
+    :param batch_size: Minibatch size for the experience replay updates.
+    :param exploration: Optional ExplorationPolicy (e.g., EpsilonGreedy, Softmax, UCB) used as the behavior
+                        policy; defaults to the uniform random policy.
+    :param monitor: Optional ConvergenceMonitor recording every episode (max Q-value change, updates and,
+                    for the "policy_stable" rule, greedy-action changes); its stopping rules can end training early.
     :return: None. Updates Q-values and policies in place.
     """
+    q_table = shared_q_table(nodes) if replay_buffer is not None else None
     max_change = float('inf')  # Initialize the maximum Q-value change
     iteration = 0  # Track the number of episodes
+    greedy = {}  # Greedy action per node, only tracked for the monitor's policy-stability rule
 
     while max_change > threshold and iteration < episodes:
         iteration += 1
         max_change = 0  # Reset the max change for this episode
+        total_reward = 0  # Undiscounted return of the episode
+        detailed = should_report(verbose, 2, iteration, log_every)  # Format step details only when printed
+        steps = 0  # Q-value updates (or replay steps) in this episode
+        touched = set()  # Nodes whose Q-values were updated in this episode
+        learned = replay_buffer is None  # Replay mode only learns once the buffer holds a minibatch
 
         # Select a random initial state
         current_node = random.choice(list(nodes.values()))
 
         # Run through an episode (usually until a terminal state is reached)
         while not current_node.is_terminal():  # Assuming `is_terminal()` determines if it's a terminal state
-            # Select action based on random equiprobable policy
-            action = random.choice(current_node.get_possible_actions())
+            # Select action based on the behavior policy (random equiprobable by default)
+            if exploration is None:
+                action = random.choice(current_node.get_possible_actions())
+            else:
+                action = exploration.select(current_node)
 
             # Debug: print selected action
-            print(f"Action chosen for state {current_node.state[0]}{current_node.state[1]} {current_node.state[2]:3s}: {action}")
+            if detailed:
+                print(f"Action chosen for state {current_node.state[0]}{current_node.state[1]} {current_node.state[2]:3s}: {action}")
 
             # Get the next state (Node object) from the action
             next_node_id = current_node.get_next_node(action)  # Fetch the ID of the next node
@@ -34,6 +81,21 @@ def q_learning(nodes, episodes=1000, alpha=0.2, gamma=0.99, threshold=0.001):
 
             # Fetch the reward for the transition
             reward = current_node.rewards.get((current_node.id, action, next_node_id), 0)  # Default reward is 0
+            total_reward += reward
+            steps += 1
+
+            # Experience replay: store the transition and learn from a sampled minibatch instead
+            if replay_buffer is not None:
+                replay_buffer.add(current_node.q_row, q_table.column(action), reward, next_node.q_row,
+                                  next_node.is_terminal())
+                if len(replay_buffer) >= batch_size:
+                    batch = replay_buffer.sample(batch_size)
+                    max_change = max(max_change, batched_q_update(q_table, batch, alpha, gamma))
+                    learned = True
+                    if exploration is not None:
+                        exploration.invalidate()  # Many Q-values changed at once
+                current_node = next_node
+                continue
 
             # Q-learning update rule
             possible_actions = next_node.get_possible_actions()
@@ -46,24 +108,49 @@ def q_learning(nodes, episodes=1000, alpha=0.2, gamma=0.99, threshold=0.001):
 
             # Set the new Q-value
             current_node.set_q_value(action, new_q_value)
+            touched.add(current_node)
+            if exploration is not None:
+                exploration.observe(current_node, action, new_q_value)
 
             # Track the change in Q-value for convergence check
             q_value_change = abs(old_q_value - new_q_value)
             max_change = max(max_change, q_value_change)
 
             # Print the details of the update for debugging
-            print(f"Episode {iteration:2}, Node ({current_node.state[0]}{current_node.state[1]} {current_node.state[2]:>3s}), Action: {action}, "
-                  f"Old Q: {old_q_value:>7.4f}, New Q: {new_q_value:>7.4f}, Reward: {reward:>7.4f}, "
-                  f"Next State Q: {max_next_q:.4f}")
+            if detailed:
+                print(f"Episode {iteration:2}, Node ({current_node.state[0]}{current_node.state[1]} {current_node.state[2]:>3s}), Action: {action}, "
+                      f"Old Q: {old_q_value:>7.4f}, New Q: {new_q_value:>7.4f}, Reward: {reward:>7.4f}, "
+                      f"Next State Q: {max_next_q:.4f}")
 
             # Transition to the next state
             current_node = next_node
 
+        if callback is not None:
+            callback({"event": "episode", "episode": iteration, "max_change": max_change,
+                      "total_reward": total_reward, "alpha": alpha})
+
         # Decrease the learning rate alpha after each episode
         alpha *= 0.995
 
         # Print debugging info for the episode
-        print(f"Episode {iteration:2} complete, Max Q-value change: {max_change:.4f}")
+        if should_report(verbose, 1, iteration, log_every):
+            print(f"Episode {iteration:2} complete, Max Q-value change: {max_change:.4f}")
+
+        if not learned:
+            # No update happened while the buffer was filling up, so this episode says nothing about convergence
+            max_change = float('inf')
+            continue
+
+        if monitor is not None:
+            policy_changes = None
+            if monitor.tracks_policy:
+                # Minibatch updates can touch any node, so replay mode rechecks them all
+                policy_changes = _greedy_changes(nodes.values() if replay_buffer is not None else touched, greedy)
+            if monitor.update(max_change, policy_changes=policy_changes, backups=steps):
+                break
+
+    if verbose < 1:
+        return
 
     # After all episodes, print the final Q-values and optimal policy
     print("\nFinal Q-values and Optimal Policies:")
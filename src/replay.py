@@ -0,0 +1,141 @@
+import numpy as np
+
+
+class ReplayBuffer:
+    def __init__(self, capacity, seed=None):
+        """
+        Ring buffer of transitions stored in preallocated NumPy arrays.
+        States and actions are stored as QTable row/column indices.
+        :param capacity: Maximum number of transitions kept; the oldest ones are overwritten.
+        :param seed: Seed for minibatch sampling.
+        """
+        self.capacity = capacity
+        self.states = np.zeros(capacity, dtype=np.int64)
+        self.actions = np.zeros(capacity, dtype=np.int64)
+        self.rewards = np.zeros(capacity)
+        self.next_states = np.zeros(capacity, dtype=np.int64)
+        self.dones = np.zeros(capacity, dtype=bool)
+        self.position = 0  # Next slot to write
+        self.size = 0
+        self.rng = np.random.default_rng(seed)
+
+    def __len__(self):
+        return self.size
+
+    def add(self, state, action, reward, next_state, done):
+        """
+        Store a single transition.
+        :return: None
+        """
+        i = self.position
+        self.states[i], self.actions[i], self.rewards[i] = state, action, reward
+        self.next_states[i], self.dones[i] = next_state, done
+        self.position = (i + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def add_batch(self, states, actions, rewards, next_states, dones):
+        """
+        Store many transitions at once (e.g., from an offline log).
+        :return: None
+        """
+        count = len(states)
+        if count > self.capacity:
+            # Only the newest transitions fit
+            states, actions, rewards, next_states, dones = (np.asarray(column)[-self.capacity:] for column in
+                                                            (states, actions, rewards, next_states, dones))
+            count = self.capacity
+        slots = (self.position + np.arange(count)) % self.capacity
+        self.states[slots] = states
+        self.actions[slots] = actions
+        self.rewards[slots] = rewards
+        self.next_states[slots] = next_states
+        self.dones[slots] = dones
+        self.position = (self.position + count) % self.capacity
+        self.size = min(self.size + count, self.capacity)
+
+    def sample(self, batch_size):
+        """
+        Draw a uniform minibatch (with replacement).
+        :param batch_size: Number of transitions to draw.
+        :return: Tuple (states, actions, rewards, next_states, dones) arrays.
+        """
+        picks = self.rng.integers(self.size, size=batch_size)
+        return self.take(picks)
+
+    def take(self, picks):
+        """
+        Gather the transitions at the given buffer positions.
+        :return: Tuple (states, actions, rewards, next_states, dones) arrays.
+        """
+        return self.states[picks], self.actions[picks], self.rewards[picks], self.next_states[picks], self.dones[picks]
+
+
+def batched_q_update(q_table, batch, alpha, gamma):
+    """
+    Apply vectorized Q-learning (TD) updates for a minibatch of transitions.
+    The max over next actions only considers the actions set in the QTable, like q_learning.
+    :param q_table: QTable whose values are updated in place.
+    :param batch: Tuple (states, actions, rewards, next_states, dones) of QTable row/column indices.
+    :param alpha: Learning rate.
+    :param gamma: Discount factor.
+    :return: Largest absolute Q-value change in the batch.
+    """
+    states, actions, rewards, next_states, dones = batch
+    values = q_table.values
+    next_q = np.where(q_table.initialized[next_states], values[next_states], -np.inf)
+    max_next_q = next_q.max(axis=1, initial=-np.inf)
+    max_next_q = np.where(np.isfinite(max_next_q) & ~dones, max_next_q, 0.0)
+
+    td_errors = rewards + gamma * max_next_q - values[states, actions]
+    # A (state, action) pair repeated in the batch moves once, by alpha times its mean TD error
+    pairs, inverse = np.unique(states * values.shape[1] + actions, return_inverse=True)
+    mean_td_errors = np.bincount(inverse, weights=td_errors) / np.bincount(inverse)
+    pair_states, pair_actions = np.divmod(pairs, values.shape[1])
+    values[pair_states, pair_actions] += alpha * mean_td_errors
+    q_table.initialized[pair_states, pair_actions] = True
+    return float(np.max(np.abs(alpha * mean_td_errors), initial=0.0))
+
+
+def shared_q_table(nodes):
+    """
+    Return the QTable shared by all nodes (as set up by initialize_nodes).
+    :param nodes: Dictionary of nodes (states) indexed by their IDs.
+    :return: The shared QTable.
+    """
+    tables = {id(node.q_table) for node in nodes.values()}
+    table = next(iter(nodes.values())).q_table
+    if table is None or len(tables) != 1:
+        raise ValueError("Batched Q-learning updates need all nodes attached to one shared QTable")
+    return table
+
+
+def train_from_log(nodes, log, epochs=1, batch_size=256, alpha=0.2, gamma=0.99, seed=None):
+    """
+    Offline Q-learning from logged transitions, applied in shuffled vectorized minibatches.
+    :param nodes: Dictionary of nodes (states) indexed by their IDs, sharing one QTable.
+    :param log: Iterable of (node_id, action, reward, next_node_id) transitions.
+    :param epochs: Number of passes over the log.
+    :param batch_size: Transitions per vectorized update.
+    :param alpha: Learning rate.
+    :param gamma: Discount factor.
+    :param seed: Seed for shuffling.
+    :return: List with the largest Q-value change of every epoch. Updates Q-values in place.
+    """
+    q_table = shared_q_table(nodes)
+    node_ids, actions, rewards, next_ids = zip(*log)
+    buffer = ReplayBuffer(len(node_ids), seed=seed)
+    buffer.add_batch([nodes[node_id].q_row for node_id in node_ids],
+                     [q_table.column(action) for action in actions],
+                     rewards,
+                     [nodes[next_id].q_row for next_id in next_ids],
+                     [nodes[next_id].is_terminal() for next_id in next_ids])
+
+    changes = []
+    for _ in range(epochs):
+        order = buffer.rng.permutation(len(buffer))
+        max_change = 0.0
+        for start in range(0, len(order), batch_size):
+            batch = buffer.take(order[start:start + batch_size])
+            max_change = max(max_change, batched_q_update(q_table, batch, alpha, gamma))
+        changes.append(max_change)
+    return changes
@@ -0,0 +1,54 @@
+import json
+
+
+def should_report(verbose, level, counter, log_every):
+    """
+    Decide whether a progress line should be printed.
+    :param verbose: Verbosity requested by the caller (0 silent, 1 progress, 2 per-step details).
+    :param level: Verbosity level the line belongs to.
+    :param counter: Current iteration or episode number (1-based).
+    :param log_every: Only every log_every-th iteration/episode is reported.
+    :return: True if the line should be printed.
+    """
+    return verbose >= level and counter % log_every == 0
+
+
+class JsonLinesLogger:
+    def __init__(self, file, flush_every=1000):
+        """
+        Solver callback that writes every event as one JSON line, e.g. for metrics ingestion.
+        :param file: Path or open text file to append the events to.
+        :param flush_every: Number of events buffered before they are written.
+        """
+        self.file = open(file, "a") if isinstance(file, str) else file
+        self.owns_file = isinstance(file, str)
+        self.flush_every = flush_every
+        self.buffer = []
+
+    def __call__(self, event):
+        """
+        Record a single event dictionary.
+        :param event: Event emitted by a solver (e.g., {"event": "iteration", "iteration": 3, "max_change": 0.1}).
+        :return: None
+        """
+        self.buffer.append(event)
+        if len(self.buffer) >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        """
+        Write the buffered events to the file.
+        :return: None
+        """
+        self.file.writelines(json.dumps(event) + "\n" for event in self.buffer)
+        self.file.flush()
+        self.buffer = []
+
+    def close(self):
+        """
+        Flush the remaining events and close the file if this logger opened it.
+        :return: None
+        """
+        self.flush()
+        if self.owns_file:
+            self.file.close()
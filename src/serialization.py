@@ -0,0 +1,177 @@
+import json
+import os
+import tempfile
+
+import numpy as np
+
+from src.model import MDPModel, compile_model
+from src.node import Node, QTable
+
+FORMAT_VERSION = 1
+
+# Arrays stored as one raw .npy file each, so they can be memory-mapped independently
+ARRAYS = ("indptr", "indices", "probs", "rewards", "action_mask", "terminal")
+
+
+def _is_string_table(labels):
+    """
+    Check whether the state labels can be stored as a rectangular string array.
+    :return: True if every label is a tuple of strings of the same length.
+    """
+    if not labels or not all(isinstance(label, tuple) for label in labels):
+        return False
+    width = len(labels[0])
+    return all(len(label) == width and all(isinstance(part, str) for part in label) for label in labels)
+
+
+def _stage(path, filename, write):
+    """
+    Write a file under a temporary name in the target directory, to be moved into place later.
+    :param path: Target directory.
+    :param filename: Final file name (used as the prefix of the temporary name).
+    :param write: Function called with the open binary file object.
+    :return: Path of the temporary file.
+    """
+    with tempfile.NamedTemporaryFile(dir=path, prefix=f".{filename}.", suffix=".tmp", delete=False) as file:
+        try:
+            write(file)
+        except BaseException:
+            file.close()
+            os.remove(file.name)
+            raise
+    return file.name
+
+
+def save_model(model, path):
+    """
+    Save a compiled model as a directory of raw .npy arrays plus a small meta.json.
+    Every file is written to a temporary name first and moved into place afterwards (meta.json last),
+    so a model memory-mapped from the same directory stays readable while it is being saved.
+    :param model: Compiled MDPModel.
+    :param path: Directory to write (created if needed).
+    :return: None
+    """
+    os.makedirs(path, exist_ok=True)
+    meta = {
+        "format_version": FORMAT_VERSION,
+        "n_states": model.n_states,
+        "n_actions": model.n_actions,
+        "actions": model.actions,
+    }
+    arrays = {name: getattr(model, name) for name in ARRAYS}
+
+    # Integer node IDs go to an array; anything else is kept in the metadata
+    if all(isinstance(state_id, (int, np.integer)) for state_id in model.state_ids):
+        arrays["state_ids"] = np.asarray(model.state_ids, dtype=np.int64)
+    else:
+        meta["state_ids"] = model.state_ids
+
+    labels = model.labels
+    if isinstance(labels, np.ndarray):
+        arrays["labels"] = labels
+    elif labels is not None:
+        labels = list(labels)
+        if _is_string_table(labels):
+            arrays["labels"] = np.array(labels, dtype=str).reshape(len(labels), -1)
+        else:
+            meta["labels"] = [list(label) if isinstance(label, tuple) else label for label in labels]
+
+    staged = {}
+    try:
+        for name, array in arrays.items():
+            staged[f"{name}.npy"] = _stage(path, f"{name}.npy", lambda file, array=array: np.save(file, array))
+        staged["meta.json"] = _stage(path, "meta.json", lambda file: file.write(json.dumps(meta).encode()))
+    except BaseException:
+        for temporary in staged.values():
+            os.remove(temporary)
+        raise
+
+    # Replacing a file leaves existing memory maps of the old one intact
+    for name in ARRAYS:
+        os.replace(staged[f"{name}.npy"], os.path.join(path, f"{name}.npy"))
+    for name in ("state_ids", "labels"):
+        target = os.path.join(path, f"{name}.npy")
+        if f"{name}.npy" in staged:
+            os.replace(staged[f"{name}.npy"], target)
+        elif os.path.exists(target):
+            os.remove(target)  # Left over from an earlier save, it would shadow the metadata
+    os.replace(staged["meta.json"], os.path.join(path, "meta.json"))
+
+
+def load_model(path, mmap=True):
+    """
+    Load a model saved with save_model.
+    :param path: Directory written by save_model.
+    :param mmap: Memory-map the arrays instead of reading them into memory.
+    :return: MDPModel backed by the (memory-mapped) arrays.
+    """
+    with open(os.path.join(path, "meta.json")) as file:
+        meta = json.load(file)
+    if meta["format_version"] != FORMAT_VERSION:
+        raise ValueError(f"Unsupported model format version {meta['format_version']}")
+
+    mmap_mode = "r" if mmap else None
+    arrays = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mmap_mode) for name in ARRAYS}
+
+    if "state_ids" in meta:
+        state_ids = [tuple(state_id) if isinstance(state_id, list) else state_id for state_id in meta["state_ids"]]
+    else:
+        state_ids = np.load(os.path.join(path, "state_ids.npy")).tolist()
+
+    labels_path = os.path.join(path, "labels.npy")
+    if os.path.exists(labels_path):
+        labels = np.load(labels_path, mmap_mode=mmap_mode)
+    elif "labels" in meta:
+        labels = [tuple(label) if isinstance(label, list) else label for label in meta["labels"]]
+    else:
+        labels = None
+
+    return MDPModel(state_ids, meta["actions"], labels=labels, **arrays)
+
+
+def save_nodes(nodes, path):
+    """
+    Compile a dictionary of nodes and save it with save_model.
+    :param nodes: Dictionary of nodes (states) indexed by their IDs.
+    :param path: Directory to write.
+    :return: None
+    """
+    save_model(compile_model(nodes), path)
+
+
+def load_nodes(path):
+    """
+    Rebuild the dictionary of Node objects (as returned by initialize_nodes) from a saved model.
+    :param path: Directory written by save_model or save_nodes.
+    :return: A dictionary mapping node IDs to Node objects.
+    """
+    model = load_model(path, mmap=True)
+    state_ids, actions = model.state_ids, model.actions
+    indptr = model.indptr.tolist()
+    indices, probs, rewards = model.indices.tolist(), model.probs.tolist(), model.rewards.tolist()
+    terminal = model.terminal.tolist()
+    q_table = QTable(actions=actions, capacity=model.n_states)
+
+    nodes = {}
+    for i, state_id in enumerate(state_ids):
+        label = model.labels[i] if model.labels is not None else None
+        if isinstance(label, np.ndarray):
+            label = tuple(label.tolist())
+        node = Node(state_id, label, is_terminal=terminal[i])
+
+        transitions, node_rewards = {}, {}
+        for j, action in enumerate(actions):
+            row = i * model.n_actions + j
+            for k in range(indptr[row], indptr[row + 1]):
+                key = (state_id, action, state_ids[indices[k]])
+                transitions[key] = probs[k]
+                node_rewards[key] = rewards[k]
+        node.transitions = transitions
+        node.rewards = node_rewards
+
+        # Initialize Q-values for each possible action (set to 0)
+        q_table.attach(node)
+        for action in node.get_possible_actions():
+            node.set_q_value(action, 0.0)
+        nodes[state_id] = node
+    return nodes
@@ -0,0 +1,238 @@
+import asyncio
+import hashlib
+import json
+from collections import OrderedDict
+
+import numpy as np
+
+from src.model import compile_model
+from src.serialization import load_model
+from src.value_iteration import solve_value_iteration
+
+# Arrays fixing the sparsity pattern (which transitions exist) and the ones holding the numbers on it
+STRUCTURE_ARRAYS = ("indptr", "indices", "action_mask", "terminal")
+CONTENT_ARRAYS = ("probs", "rewards")
+
+
+def _update_hash(digest, model, names):
+    """
+    Feed the model's identifiers and the named arrays (with their dtypes and shapes) into a hash object.
+    :return: None
+    """
+    digest.update(repr((list(model.state_ids), list(model.actions))).encode())
+    for name in names:
+        array = np.ascontiguousarray(getattr(model, name))
+        digest.update(f"{name}:{array.dtype.str}:{array.shape}".encode())
+        digest.update(array.data)
+
+
+def structure_hash(model):
+    """
+    Hash of the model's states, actions and sparsity pattern, ignoring probabilities and rewards.
+    Models sharing it are near matches whose solutions make good starting points for each other.
+    :param model: Compiled MDPModel.
+    :return: Hex digest string.
+    """
+    digest = hashlib.sha256()
+    _update_hash(digest, model, STRUCTURE_ARRAYS)
+    return digest.hexdigest()
+
+
+def model_hash(model, discount_factor):
+    """
+    Content hash of the model's transitions, rewards and the discount factor.
+    :param model: Compiled MDPModel.
+    :param discount_factor: Discount factor the model is solved with.
+    :return: Hex digest string.
+    """
+    digest = hashlib.sha256()
+    _update_hash(digest, model, STRUCTURE_ARRAYS + CONTENT_ARRAYS)
+    digest.update(repr(float(discount_factor)).encode())
+    return digest.hexdigest()
+
+
+class SolverCache:
+    def __init__(self, max_bytes=64 * 2 ** 20):
+        """
+        LRU cache of solved (values, policy) arrays, evicting the least recently used entries
+        once their total size exceeds max_bytes.
+        :param max_bytes: Size budget for the cached arrays.
+        """
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.entries = OrderedDict()  # content hash -> (structure hash, values, policy)
+        self.by_structure = {}  # structure hash -> content hash of the most recent solution with that structure
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key):
+        """
+        Look up a solution and mark it as recently used.
+        :return: Tuple (values, policy), or None if the key is not cached.
+        """
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        self.entries.move_to_end(key)
+        return entry[1], entry[2]
+
+    def nearest(self, structure):
+        """
+        Find a cached solution of a model with the same structure.
+        :return: Values array, or None if no model with this structure is cached.
+        """
+        key = self.by_structure.get(structure)
+        return None if key is None else self.entries[key][1]
+
+    def put(self, key, structure, values, policy):
+        """
+        Store a solution (made read-only, since it is shared by every caller) and evict old entries.
+        :return: None
+        """
+        if key in self.entries:
+            return
+        values.flags.writeable = False
+        policy.flags.writeable = False
+        self.entries[key] = (structure, values, policy)
+        self.by_structure[structure] = key
+        self.nbytes += values.nbytes + policy.nbytes
+        while self.nbytes > self.max_bytes and len(self.entries) > 1:
+            self._evict()
+
+    def _evict(self):
+        """
+        Drop the least recently used entry.
+        :return: None
+        """
+        key, (structure, values, policy) = self.entries.popitem(last=False)
+        self.nbytes -= values.nbytes + policy.nbytes
+        if self.by_structure.get(structure) == key:
+            del self.by_structure[structure]
+
+
+class SolverService:
+    def __init__(self, max_cache_bytes=64 * 2 ** 20, threshold=0.001, mode="gauss_seidel", executor=None):
+        """
+        In-process solver service for repeated value iteration on identical or near-identical models.
+        Results are cached by content hash, concurrent requests for the same model share a single solve,
+        and models that only differ in probabilities/rewards are warm-started from a cached solution.
+        :param max_cache_bytes: Size budget of the LRU result cache.
+        :param threshold: Convergence threshold passed to solve_value_iteration.
+        :param mode: Value iteration mode passed to solve_value_iteration.
+        :param executor: Optional concurrent.futures executor for the solves (the loop's default executor otherwise).
+        """
+        self.cache = SolverCache(max_cache_bytes)
+        self.threshold = threshold
+        self.mode = mode
+        self.executor = executor
+        self.in_flight = {}  # content hash -> task of the running solve
+        self.stats = {"hits": 0, "misses": 0, "coalesced": 0, "warm_starts": 0}
+
+    async def solve(self, model, discount_factor=0.99):
+        """
+        Solve a compiled model, serving cached or in-flight results when possible.
+        :param model: Compiled MDPModel.
+        :param discount_factor: Discount factor (gamma) for future rewards.
+        :return: Tuple (values, policy) of read-only arrays indexed like the model.
+        """
+        key = model_hash(model, discount_factor)
+        cached = self.cache.get(key)
+        if cached is not None:
+            self.stats["hits"] += 1
+            return cached
+        task = self.in_flight.get(key)
+        if task is not None:
+            self.stats["coalesced"] += 1
+        else:
+            self.stats["misses"] += 1
+            structure = structure_hash(model)
+            initial_values = self.cache.nearest(structure)
+            if initial_values is not None:
+                self.stats["warm_starts"] += 1
+            # The solve belongs to the service, so cancelling one caller neither cancels the others nor loses the result
+            task = asyncio.ensure_future(self._run_solve(key, structure, model, discount_factor, initial_values))
+            task.add_done_callback(lambda done: done.cancelled() or done.exception())  # Retrieved even if nobody waits
+            self.in_flight[key] = task
+        return await asyncio.shield(task)
+
+    async def _run_solve(self, key, structure, model, discount_factor, initial_values):
+        """
+        Run one solve in the executor and cache its result.
+        :return: Tuple (values, policy).
+        """
+        loop = asyncio.get_running_loop()
+        try:
+            values, policy, _ = await loop.run_in_executor(
+                self.executor, lambda: solve_value_iteration(model, self.threshold, discount_factor, mode=self.mode,
+                                                             initial_values=initial_values))
+            self.cache.put(key, structure, values, policy)
+            return values, policy
+        finally:
+            del self.in_flight[key]
+
+    async def solve_nodes(self, nodes, discount_factor=0.99):
+        """
+        Solve a dictionary of nodes through the service and write the results back.
+        :param nodes: Dictionary of nodes (states) indexed by their IDs.
+        :param discount_factor: Discount factor (gamma) for future rewards.
+        :return: None. Updates node values and policies in place.
+        """
+        model = compile_model(nodes)
+        values, policy = await self.solve(model, discount_factor)
+        model.write_back(nodes, values, policy)
+
+    async def _handle_connection(self, reader, writer):
+        """
+        Serve JSON-lines requests {"model": saved model directory, "discount_factor": gamma} on one connection.
+        Each response is {"values": [...], "policy": [...]} with policy as action labels, or {"error": message}.
+        :return: None
+        """
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                    model = load_model(request["model"], mmap=True)
+                    values, policy = await self.solve(model, request.get("discount_factor", 0.99))
+                    response = {"values": values.tolist(), "policy": model.policy_labels(policy)}
+                except Exception as error:
+                    response = {"error": f"{type(error).__name__}: {error}"}
+                writer.write((json.dumps(response) + "\n").encode())
+                await writer.drain()
+        finally:
+            writer.close()
+
+    async def serve(self, socket_path):
+        """
+        Run a JSON-lines server on a Unix socket until cancelled.
+        Models are passed by the path of a directory written by src.serialization.save_model.
+        :param socket_path: Filesystem path of the Unix socket.
+        :return: None
+        """
+        server = await asyncio.start_unix_server(self._handle_connection, path=socket_path)
+        async with server:
+            await server.serve_forever()
+
+
+async def request_solve(socket_path, model_path, discount_factor=0.99):
+    """
+    Client for SolverService.serve: solve a saved model through the service.
+    :param socket_path: Filesystem path of the service's Unix socket.
+    :param model_path: Directory written by src.serialization.save_model.
+    :param discount_factor: Discount factor (gamma) for future rewards.
+    :return: Dictionary with "values" and "policy" lists.
+    """
+    reader, writer = await asyncio.open_unix_connection(socket_path)
+    try:
+        writer.write((json.dumps({"model": model_path, "discount_factor": discount_factor}) + "\n").encode())
+        await writer.drain()
+        response = json.loads(await reader.readline())
+    finally:
+        writer.close()
+        await writer.wait_closed()
+    if "error" in response:
+        raise RuntimeError(response["error"])
+    return response
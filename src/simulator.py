@@ -0,0 +1,159 @@
+import numpy as np
+
+
+class EpisodeBatch:
+    def __init__(self, returns, lengths, states=None, actions=None, rewards=None, next_states=None, truncated=None):
+        """
+        Result of simulating many episodes at once.
+        :param returns: Array of (discounted) episode returns.
+        :param lengths: Array with the number of steps of each episode.
+        :param states: Optional (n_episodes, max_length) array of state indices, padded with -1.
+        :param actions: Optional (n_episodes, max_length) array of action indices, padded with -1.
+        :param rewards: Optional (n_episodes, max_length) array of rewards, padded with 0.
+        :param next_states: Optional (n_episodes, max_length) array of successor state indices, padded with -1.
+        :param truncated: Boolean array marking episodes cut off by max_steps before reaching a terminal node.
+        """
+        self.returns = returns
+        self.lengths = lengths
+        self.states = states
+        self.actions = actions
+        self.rewards = rewards
+        self.next_states = next_states
+        self.truncated = truncated if truncated is not None else np.zeros(len(lengths), dtype=bool)
+
+    def experiences(self, episode, model):
+        """
+        Rebuild the experience list of one episode in the format returned by run_episode.
+        :param episode: Episode index within the batch.
+        :param model: The MDPModel the batch was simulated on.
+        :return: List of (node_id, action, reward) tuples.
+        """
+        length = self.lengths[episode]
+        return [(model.state_ids[s], model.actions[a], r) for s, a, r in
+                zip(self.states[episode, :length].tolist(), self.actions[episode, :length].tolist(),
+                    self.rewards[episode, :length].tolist())]
+
+
+class EpisodeSimulator:
+    def __init__(self, model):
+        """
+        Lockstep episode simulator over a compiled MDPModel.
+        Precomputes the cumulative probability table of every (state, action) row once.
+        :param model: Compiled MDPModel (see src.model.compile_model).
+        """
+        self.model = model
+
+        # Global running sum of probabilities; row r covers cumulative[indptr[r]:indptr[r + 1]]
+        self.cumulative = np.cumsum(model.probs)
+        row_start = model.indptr[:-1]
+        row_end = model.indptr[1:]
+        self.row_offset = np.where(row_start > 0, self.cumulative[np.maximum(row_start - 1, 0)], 0.0)
+        row_cumulative = np.where(row_end > row_start, self.cumulative[np.maximum(row_end - 1, 0)], 0.0)
+        self.row_total = row_cumulative - self.row_offset
+
+        # Actions whose transitions all have probability 0 are available but have no successor to sample
+        self.simulable = model.action_mask & (np.diff(model.indptr) > 0).reshape(model.n_states, model.n_actions)
+
+        # Simulable actions per state in CSR layout, for uniform random action selection
+        states, actions = np.nonzero(self.simulable)
+        self.action_counts = np.bincount(states, minlength=model.n_states)
+        self.action_indptr = np.concatenate(([0], np.cumsum(self.action_counts)))
+        self.available_actions = actions
+
+        # Episodes stop in terminal nodes and in nodes without any action to take
+        self.stops = model.terminal | ~self.simulable.any(axis=1)
+
+    def _select_actions(self, states, policy, rng):
+        """
+        Draw one action per active episode.
+        :return: Array of action indices.
+        """
+        if policy is None:
+            # Uniform over available actions, like Node.select_action
+            choice = (rng.random(len(states)) * self.action_counts[states]).astype(np.int64)
+            return self.available_actions[self.action_indptr[states] + choice]
+        if policy.ndim == 1:
+            return policy[states]
+        # Stochastic policy given as an (n_states, n_actions) probability matrix
+        cumulative = np.cumsum(policy[states], axis=1)
+        draws = rng.random(len(states)) * cumulative[:, -1]
+        return np.minimum((cumulative <= draws[:, None]).sum(axis=1), self.model.n_actions - 1)
+
+    def _sample_next(self, rows, rng):
+        """
+        Draw one successor per active episode from the cumulative probability table.
+        :return: Array of positions into the model's transition arrays.
+        """
+        targets = self.row_offset[rows] + rng.random(len(rows)) * self.row_total[rows]
+        positions = np.searchsorted(self.cumulative, targets, side="right")
+        # Guard against round-off at the segment boundaries
+        return np.clip(positions, self.model.indptr[rows], self.model.indptr[rows + 1] - 1)
+
+    def run(self, start, n_episodes, policy=None, rng=None, discount_factor=1.0, max_steps=None, record=False):
+        """
+        Advance n_episodes independent episodes in lockstep until each reaches a terminal node.
+        :param start: Node ID of the start state, or an array of start state indices (one per episode).
+        :param n_episodes: Number of episodes to simulate.
+        :param policy: None for the uniform random policy, an array of action indices per state,
+                       or an (n_states, n_actions) matrix of action probabilities.
+        :param rng: numpy.random.Generator or seed.
+        :param discount_factor: Discount applied to rewards when accumulating returns.
+        :param max_steps: Episodes still running after this many steps are truncated (and marked in
+                          EpisodeBatch.truncated); None runs every episode until it terminates.
+        :param record: Whether to keep the full trajectories (states, actions, rewards, next states).
+        :return: EpisodeBatch with returns, lengths and, if recorded, the trajectories.
+        """
+        model = self.model
+        rng = np.random.default_rng(rng)
+        if policy is not None:
+            policy = np.asarray(policy)
+
+        if np.ndim(start) == 0:
+            states = np.full(n_episodes, model.state_index[start], dtype=np.int64)
+        else:
+            states = np.array(start, dtype=np.int64)
+
+        returns = np.zeros(n_episodes)
+        lengths = np.zeros(n_episodes, dtype=np.int64)
+        active = np.flatnonzero(~self.stops[states])
+        discount = 1.0
+        steps = []
+
+        step = 0
+        while len(active) and (max_steps is None or step < max_steps):
+            step += 1
+            current = states[active]
+            actions = self._select_actions(current, policy, rng)
+            # Negative entries (e.g. -1 for "no action") would wrap around to another state's rows
+            if policy is not None and not ((actions >= 0).all() and self.simulable[current, actions].all()):
+                raise ValueError("The policy selects an action without any transition to simulate")
+            positions = self._sample_next(current * model.n_actions + actions, rng)
+            rewards = model.rewards[positions]
+
+            returns[active] += discount * rewards
+            lengths[active] += 1
+            states[active] = model.indices[positions]
+            if record:
+                steps.append((active, current, actions, rewards, states[active]))
+
+            active = active[~self.stops[states[active]]]
+            discount *= discount_factor
+
+        truncated = np.zeros(n_episodes, dtype=bool)
+        truncated[active] = True
+        if not record:
+            return EpisodeBatch(returns, lengths, truncated=truncated)
+
+        # Lay the per-step records out as padded (episode, step) arrays
+        width = len(steps)
+        trajectory_states = np.full((n_episodes, width), -1, dtype=np.int64)
+        trajectory_actions = np.full((n_episodes, width), -1, dtype=np.int64)
+        trajectory_rewards = np.zeros((n_episodes, width))
+        trajectory_next = np.full((n_episodes, width), -1, dtype=np.int64)
+        for step, (episodes, current, actions, rewards, next_states) in enumerate(steps):
+            trajectory_states[episodes, step] = current
+            trajectory_actions[episodes, step] = actions
+            trajectory_rewards[episodes, step] = rewards
+            trajectory_next[episodes, step] = next_states
+        return EpisodeBatch(returns, lengths, trajectory_states, trajectory_actions, trajectory_rewards,
+                            trajectory_next, truncated)
@@ -1,11 +1,23 @@
+import time
 
+import numpy as np
 
-def value_iteration(nodes, threshold=0.001, discount_factor=0.99):
+from src.reporting import should_report
+
+
+def value_iteration(nodes, threshold=0.001, discount_factor=0.99, verbose=0, log_every=1, callback=None, monitor=None):
     """
     Performs value iteration to find the optimal policy.
     :param nodes: Dictionary of nodes (states) indexed by their IDs.
     :param threshold: Stopping criteria for the maximum value change.
     :param discount_factor: Discount factor (gamma) for future rewards.
+    :param verbose: 0 prints nothing, 1 prints one line per iteration and the final results,
+                    2 also prints every node update.
+    :param log_every: Only print every log_every-th iteration.
+    :param callback: Optional function called after every iteration with an event dictionary
+                     {"event": "iteration", "iteration", "max_change"}.
+    :param monitor: Optional ConvergenceMonitor recording every sweep; its stopping rules can end the loop
+                    before the threshold is reached (e.g., once the policy is stable).
     :return: None. Updates node values and policies in place.
     """
     iterations = 0  # Count the number of iterations
@@ -14,6 +26,9 @@ def value_iteration(nodes, threshold=0.001, discount_factor=0.99):
     while max_change > threshold:
         iterations += 1
         max_change = 0  # Reset the maximum change per iteration
+        detailed = should_report(verbose, 2, iterations, log_every)  # Format node updates only when printed
+        # Signed extremes of the changes of nodes with actions, and policy flips, for the monitor
+        lowest_change, highest_change, policy_changes = float('inf'), -float('inf'), 0
 
         # Iterate over each node to update its value
         for node in nodes.values():
@@ -29,7 +44,8 @@ def value_iteration(nodes, threshold=0.001, discount_factor=0.99):
                 action_value = node.get_next_state_value(action, nodes, discount_factor)
 
                 # Store the action value
-                action_values[action] = action_value
+                if detailed:
+                    action_values[action] = action_value
 
                 # Check if this action is the best so far
                 if action_value > best_action_value:
@@ -41,26 +57,229 @@ def value_iteration(nodes, threshold=0.001, discount_factor=0.99):
                 best_action_value = old_value
 
             # Update the node's value and policy
+            if node.policy != best_action:
+                policy_changes += 1
             node.value = best_action_value
             node.policy = best_action
 
             # Calculate the change in value for this node
             value_change = abs(old_value - node.value)
             max_change = max(max_change, value_change)
+            if monitor is not None and best_action is not None:
+                lowest_change = min(lowest_change, node.value - old_value)
+                highest_change = max(highest_change, node.value - old_value)
 
             # Print updates (for debugging)
-            action_value_str = ", ".join([f"{action}: {val:>7.4f}" for action, val in action_values.items()])
-            print(f"Node ({node.state[0]}{node.state[1]} {node.state[2]:>3s}): Old Value: {old_value:>7.4f}, New Value: {node.value:>7.4f}, "
-                  f"Action Values{{ {action_value_str:34s} }}, Optimal Action: {best_action}, Action Value: {best_action_value:>7.4f}")
+            if detailed:
+                action_value_str = ", ".join([f"{action}: {val:>7.4f}" for action, val in action_values.items()])
+                print(f"Node ({node.state[0]}{node.state[1]} {node.state[2]:>3s}): Old Value: {old_value:>7.4f}, New Value: {node.value:>7.4f}, "
+                      f"Action Values{{ {action_value_str:34s} }}, Optimal Action: {best_action}, Action Value: {best_action_value:>7.4f}")
+
+        if callback is not None:
+            callback({"event": "iteration", "iteration": iterations, "max_change": max_change})
 
         # Debugging output for each iteration
-        print(f"Iteration {iterations} - Max Value Change: {max_change:.4f}\n")
+        if should_report(verbose, 1, iterations, log_every):
+            print(f"Iteration {iterations} - Max Value Change: {max_change:.4f}\n")
+
+        span = highest_change - lowest_change if highest_change >= lowest_change else 0.0
+        if monitor is not None and monitor.update(max_change, span, policy_changes, len(nodes)):
+            break
 
     # Final results
-    print("Final Value Iteration Results:")
-    for node in nodes.values():
-        print(f"Node ({node.state[0]}{node.state[1]} {node.state[2]:>3s}): Value = {node.value:>7.4f}, Optimal Action = {node.policy}")
+    if verbose >= 1:
+        print("Final Value Iteration Results:")
+        for node in nodes.values():
+            print(f"Node ({node.state[0]}{node.state[1]} {node.state[2]:>3s}): Value = {node.value:>7.4f}, Optimal Action = {node.policy}")
+
+        print(f"\nTotal Iterations: {iterations}")
+
+
+
+
+def _predecessors(model):
+    """
+    Build a reverse-transition index: for every state, the states that can reach it in one step.
+    :param model: Compiled MDPModel.
+    :return: Tuple (indptr, sources) in CSR layout indexed by the successor state.
+    """
+    sources = model.row // max(model.n_actions, 1)
+    pairs = np.unique(np.stack([model.indices, sources]), axis=1)
+    counts = np.bincount(pairs[0], minlength=model.n_states)
+    return np.concatenate(([0], np.cumsum(counts))), pairs[1]
+
+
+def solve_value_iteration(model, threshold=0.001, discount_factor=0.99, mode="sync", initial_values=None,
+                          max_iterations=None, block_size=1024, monitor=None):
+    """
+    Array-based value iteration on a compiled MDPModel.
+    :param model: Compiled MDPModel (see src.model.compile_model).
+    :param threshold: Stopping criteria for the maximum value change.
+    :param discount_factor: Discount factor (gamma) for future rewards.
+    :param mode: "sync" for batched Jacobi backups over all states, "gauss_seidel" for in-place backups
+                 over blocks of block_size states, or "prioritized" for prioritized sweeping on the Bellman residual
+                 (fewer backups than full sweeps, but more bookkeeping per backup, so it only pays off in
+                 wall-clock time when backups are expensive).
+    :param initial_values: Optional starting values (e.g., model.values_from_nodes(nodes)); zeros by default.
+    :param max_iterations: Optional cap on the number of sweeps (state backups / n_states in prioritized mode).
+    :param block_size: Number of states updated together in Gauss-Seidel mode (1 is classical Gauss-Seidel)
+                       and in prioritized mode (the block_size states with the largest residuals).
+    :param monitor: Optional ConvergenceMonitor recording every sweep ("sync" and "gauss_seidel" modes);
+                    its stopping rules can end the solve before the threshold is reached.
+    :return: Tuple (values, policy, stats) with policy as action indices (-1 for no action) and stats a dict
+             with "iterations", "backups", "max_change" and "time".
+    """
+    start_time = time.perf_counter()
+    if initial_values is None:
+        values = np.zeros(model.n_states)
+    else:
+        values = np.array(initial_values, dtype=np.float64)
+
+    if mode == "sync":
+        iterations, backups, max_change = _sync_sweeps(model, values, threshold, discount_factor, max_iterations,
+                                                       monitor)
+    elif mode == "gauss_seidel":
+        iterations, backups, max_change = _gauss_seidel_sweeps(model, values, threshold, discount_factor,
+                                                               max_iterations, block_size, monitor)
+    elif mode == "prioritized":
+        if monitor is not None:
+            raise ValueError("Prioritized sweeping has no sweeps for a ConvergenceMonitor to record")
+        iterations, backups, max_change = _prioritized_sweeping(model, values, threshold, discount_factor,
+                                                                max_iterations, block_size)
+    else:
+        raise ValueError(f"Unknown value iteration mode: {mode!r}")
+
+    # Greedy policy with respect to the final values
+    _, policy = model.greedy(values, discount_factor)
+
+    stats = {
+        "iterations": iterations,
+        "backups": backups,
+        "max_change": max_change,
+        "time": time.perf_counter() - start_time,
+    }
+    return values, policy, stats
+
+
+def _sync_sweeps(model, values, threshold, discount_factor, max_iterations, monitor=None):
+    """
+    Synchronous (Jacobi) sweeps: every state is backed up from the previous sweep's values.
+    :return: Tuple (iterations, backups, max_change). Updates values in place.
+    """
+    iterations = 0
+    max_change = float('inf')
+    policy = None
+    while max_change > threshold and (max_iterations is None or iterations < max_iterations):
+        iterations += 1
+        new_values, new_policy = model.greedy(values, discount_factor)
+        max_change = float(np.max(np.abs(new_values - values), initial=0.0))
+        stop = monitor is not None and monitor.update_arrays(values, new_values, policy, new_policy, model.n_states,
+                                                               model.has_actions)
+        values[:] = new_values
+        policy = new_policy
+        if stop:
+            break
+    return iterations, iterations * model.n_states, max_change
+
+
+def _block_backup(model, values, low, high, discount_factor):
+    """
+    Bellman backup of the contiguous block of states [low, high) against the given value vector.
+    :return: Tuple (new values, greedy action indices) for the block, -1 where no action exists.
+    """
+    n_actions = model.n_actions
+    start, end = model.indptr[low * n_actions], model.indptr[high * n_actions]
+    contributions = model.probs[start:end] * (model.rewards[start:end]
+                                              + discount_factor * values[model.indices[start:end]])
+    q = np.bincount(model.row[start:end] - low * n_actions, weights=contributions,
+                    minlength=(high - low) * n_actions).astype(np.float64).reshape(high - low, n_actions)
+    q[~model.action_mask[low:high]] = -np.inf
+    has_actions = model.has_actions[low:high]
+    new_values = np.where(has_actions, q.max(axis=1, initial=-np.inf), values[low:high])
+    return new_values, np.where(has_actions, q.argmax(axis=1), -1)
+
+
+def _gauss_seidel_sweeps(model, values, threshold, discount_factor, max_iterations, block_size, monitor=None):
+    """
+    In-place sweeps: each block of states sees the values already updated earlier in the same sweep.
+    :return: Tuple (iterations, backups, max_change). Updates values in place.
+    """
+    iterations = 0
+    max_change = float('inf')
+    policy = None
+    while max_change > threshold and (max_iterations is None or iterations < max_iterations):
+        iterations += 1
+        max_change = 0.0
+        if monitor is not None:
+            old_values = values.copy()
+            new_policy = np.full(model.n_states, -1, dtype=np.int64)
+        for low in range(0, model.n_states, block_size):
+            high = min(low + block_size, model.n_states)
+            new_values, block_policy = _block_backup(model, values, low, high, discount_factor)
+            max_change = max(max_change, float(np.max(np.abs(new_values - values[low:high]), initial=0.0)))
+            values[low:high] = new_values
+            if monitor is not None:
+                new_policy[low:high] = block_policy
+        if monitor is not None:
+            stop = monitor.update_arrays(old_values, values, policy, new_policy, model.n_states, model.has_actions)
+            policy = new_policy
+            if stop:
+                break
+    return iterations, iterations * model.n_states, max_change
+
+
+def _states_backup(model, values, states, discount_factor):
+    """
+    Bellman backup of an arbitrary set of states in one vectorized call.
+    :param states: Array of state indices.
+    :return: Array of backed-up values (states without actions keep their value).
+    """
+    n_actions = model.n_actions
+    rows = (states[:, None] * n_actions + np.arange(n_actions)).ravel()
+    starts = model.indptr[rows]
+    lengths = model.indptr[rows + 1] - starts
+    local_rows = np.repeat(np.arange(len(rows)), lengths)
+    # Position of every entry: its row's start plus its offset within the row
+    entries = np.repeat(starts - (np.cumsum(lengths) - lengths), lengths) + np.arange(lengths.sum())
+    contributions = model.probs[entries] * (model.rewards[entries] + discount_factor * values[model.indices[entries]])
+    q = np.bincount(local_rows, weights=contributions,
+                    minlength=len(rows)).astype(np.float64).reshape(len(states), n_actions)
+    q[~model.action_mask[states]] = -np.inf
+    return np.where(model.has_actions[states], q.max(axis=1, initial=-np.inf), values[states])
+
+
+def _prioritized_sweeping(model, values, threshold, discount_factor, max_iterations, batch_size):
+    """
+    Prioritized sweeping: repeatedly back up the batch_size states with the largest Bellman residuals and
+    recompute the residuals of their predecessors in one vectorized backup, until no residual exceeds the threshold.
+    Residual checks of predecessors do not change their values and are not counted as backups.
+    :return: Tuple (iterations, backups, max_change). Updates values in place.
+    """
+    pred_indptr, pred_sources = _predecessors(model)
+    max_backups = None if max_iterations is None else max_iterations * model.n_states
+
+    # Start from the residual of every state
+    new_values, _ = model.greedy(values, discount_factor)
+    priority = np.abs(new_values - values)
+    backups = 0
 
-    print(f"\nTotal Iterations: {iterations}")
+    while max_backups is None or backups < max_backups:
+        pending = np.flatnonzero(priority > threshold)
+        if not len(pending):
+            break
+        if len(pending) > batch_size:
+            pending = pending[np.argpartition(priority[pending], -batch_size)[-batch_size:]]
+        values[pending] = _states_backup(model, values, pending, discount_factor)
+        priority[pending] = 0.0
+        backups += len(pending)
 
+        # The predecessors' residuals may have changed; recompute them together
+        starts = pred_indptr[pending]
+        lengths = pred_indptr[pending + 1] - starts
+        positions = np.repeat(starts - (np.cumsum(lengths) - lengths), lengths) + np.arange(lengths.sum())
+        predecessors = np.unique(pred_sources[positions])
+        priority[predecessors] = np.abs(_states_backup(model, values, predecessors, discount_factor)
+                                        - values[predecessors])
 
+    max_change = float(np.max(priority, initial=0.0))
+    return int(np.ceil(backups / max(model.n_states, 1))), backups, max_change
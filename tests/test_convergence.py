@@ -0,0 +1,37 @@
+import numpy as np
+
+from benchmarks.generators import generate
+from src.convergence import ConvergenceMonitor
+from src.value_iteration import value_iteration
+
+
+def test_uniform_shift_has_zero_span():
+    """
+    A uniform shift of every value has span 0, so the "span" rule fires even though the residual is 1.
+    """
+    monitor = ConvergenceMonitor(0.01, rules=("span",))
+    assert monitor.update_arrays(np.zeros(3), np.ones(3))
+    assert monitor.spans == [0.0]
+    assert monitor.stop_reason == "span"
+
+
+def test_span_ignores_states_without_actions():
+    """
+    States that are never backed up must not pull the span towards 0.
+    """
+    monitor = ConvergenceMonitor(0.01, rules=("span",))
+    monitor.update_arrays(np.zeros(3), np.array([1.0, 2.0, 0.0]), active=np.array([True, True, False]))
+    assert monitor.spans == [1.0]
+
+
+def test_span_rule_stops_value_iteration_before_max_norm():
+    """
+    On a discounted random MDP the span seminorm converges faster than the max-norm residual.
+    """
+    iterations = {}
+    for rule in ("max_norm", "span"):
+        monitor = ConvergenceMonitor(0.001, rules=(rule,))
+        value_iteration(generate("random", 300, seed=1), threshold=0, monitor=monitor)
+        assert monitor.stop_reason == rule
+        iterations[rule] = monitor.iterations
+    assert iterations["span"] < iterations["max_norm"]
@@ -0,0 +1,73 @@
+import warnings
+
+import numpy as np
+import pytest
+
+from src.mdp import initialize_nodes
+from src.model import compile_model
+from src.monte_carlo import MonteCarloEstimator, _visit_returns, monte_carlo_update, run_experiment
+from src.simulator import EpisodeSimulator
+
+
+@pytest.mark.parametrize("every_visit", [False, True])
+def test_constant_alpha_batch_matches_sequential_updates(every_visit):
+    """
+    A constant-alpha batch merge must equal applying the visits one after another.
+    """
+    model = compile_model(initialize_nodes())
+    batch = EpisodeSimulator(model).run(1, 200, rng=0, record=True)
+    estimator = MonteCarloEstimator(model, discount_factor=0.9, every_visit=every_visit, alpha=0.1)
+    estimator.values[:] = 1.0
+    estimator.update(batch)
+
+    expected = np.ones(model.n_states)
+    for key, visit_return in zip(*_visit_returns(batch, model.n_states, 0.9, every_visit)):
+        expected[key] += 0.1 * (visit_return - expected[key])
+    assert np.allclose(estimator.values, expected)
+
+
+def test_old_monte_carlo_update_signature_raises_type_error():
+    """
+    The pre-experiences call monte_carlo_update(visited_nodes, total_reward, nodes, alpha) must fail clearly.
+    """
+    with pytest.raises(TypeError, match="experiences"):
+        monte_carlo_update([1, 3], 5.0, initialize_nodes(), 0.1)
+
+
+def test_simulator_rejects_negative_policy_entries():
+    """
+    A policy entry of -1 for a state with actions must raise instead of sampling another state's transitions.
+    """
+    model = compile_model(initialize_nodes())
+    with pytest.raises(ValueError, match="policy"):
+        EpisodeSimulator(model).run(0, 10, policy=np.full(model.n_states, -1), rng=0)
+
+
+def test_vectorized_experiment_matches_sequential_updates_of_the_same_episodes():
+    """
+    Chunked array updates must give the values of applying monte_carlo_update episode by episode.
+    """
+    nodes = initialize_nodes()
+    run_experiment(nodes[0], nodes, episodes=50, alpha=0.1, vectorized=True, seed=0, discount_factor=0.9,
+                   chunk_size=7)
+
+    expected = initialize_nodes()
+    model = compile_model(expected)
+    simulator, rng = EpisodeSimulator(model), np.random.default_rng(0)
+    for size in [7] * 7 + [1]:
+        batch = simulator.run(0, size, rng=rng, record=True)
+        for episode in range(size):
+            monte_carlo_update(batch.experiences(episode, model), expected, 0.1, 0.9)
+    assert all(abs(nodes[node_id].value - node.value) < 1e-12 for node_id, node in expected.items())
+
+
+def test_vectorized_experiment_warns_about_truncated_episodes():
+    """
+    Episodes cut off by max_steps must be reported; by default every episode runs to a terminal node.
+    """
+    nodes = initialize_nodes()
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        run_experiment(nodes[0], nodes, episodes=20, vectorized=True, seed=0)
+    with pytest.warns(RuntimeWarning, match="truncated"):
+        run_experiment(nodes[0], nodes, episodes=20, vectorized=True, seed=0, max_steps=1)
@@ -0,0 +1,37 @@
+import pickle
+
+from src.mdp import initialize_nodes
+from src.value_iteration import value_iteration
+
+
+def test_in_place_reward_edit_is_picked_up():
+    """
+    Editing node.rewards in place must refresh the cached successors used by value_iteration.
+    """
+    nodes = initialize_nodes()
+    value_iteration(nodes)
+    assert nodes[8].value == 4.0
+
+    nodes[8].rewards[(8, 'P', 10)] = 100
+    value_iteration(nodes)
+    assert nodes[8].value == 100.0
+
+
+def test_in_place_transition_edit_is_picked_up():
+    """
+    Removing a transition in place must remove it from the cached successors.
+    """
+    nodes = initialize_nodes()
+    assert nodes[8].get_successors('P')[0] == (10,)
+    del nodes[8].transitions[(8, 'P', 10)]
+    assert nodes[8].get_successors('P')[0] == ()
+    assert 'P' not in nodes[8].get_possible_actions()
+
+
+def test_pickled_nodes_keep_tracking_edits():
+    """
+    Unpickled nodes must still refresh their caches after in-place edits.
+    """
+    nodes = pickle.loads(pickle.dumps(initialize_nodes()))
+    nodes[8].rewards[(8, 'P', 10)] = 7
+    assert nodes[8].get_successors('P')[2] == (7,)
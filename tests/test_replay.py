@@ -0,0 +1,31 @@
+import random
+
+from src.mdp import initialize_nodes
+from src.q_learning import q_learning
+from src.replay import ReplayBuffer, train_from_log
+
+
+def test_replay_q_learning_keeps_running_while_the_buffer_fills():
+    """
+    Episodes without a minibatch update must not count as converged.
+    """
+    random.seed(0)
+    nodes = initialize_nodes()
+    episodes = []
+    q_learning(nodes, episodes=50, replay_buffer=ReplayBuffer(1000, seed=0), batch_size=32,
+               callback=episodes.append)
+    assert len(episodes) > 1
+    assert any(node.q_value(action) != 0 for node in nodes.values() for action in node.get_possible_actions())
+
+
+def test_duplicate_pairs_in_a_batch_do_not_overshoot():
+    """
+    A (state, action) pair repeated k times in a batch must move by alpha once, not k times.
+    """
+    nodes = initialize_nodes()
+    train_from_log(nodes, [(8, 'P', 4, 10)] * 20, batch_size=20, alpha=0.2, seed=0)
+    assert abs(nodes[8].q_value('P') - 0.8) < 1e-12
+
+    # Repeated epochs converge to the target instead of diverging past it
+    train_from_log(nodes, [(8, 'P', 4, 10)] * 20, epochs=100, batch_size=20, alpha=0.2, seed=0)
+    assert abs(nodes[8].q_value('P') - 4.0) < 1e-6
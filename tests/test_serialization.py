@@ -0,0 +1,37 @@
+import numpy as np
+
+from benchmarks.generators import generate
+from src.mdp import initialize_nodes
+from src.model import compile_model
+from src.serialization import ARRAYS, load_model, load_nodes, save_model, save_nodes
+
+
+def test_save_nodes_round_trip(tmp_path):
+    """
+    Nodes loaded back from save_nodes must have the same states, transitions, rewards and terminal flags.
+    """
+    nodes = initialize_nodes()
+    save_nodes(nodes, tmp_path)
+    loaded = load_nodes(tmp_path)
+
+    assert list(loaded) == list(nodes)
+    for node_id, node in nodes.items():
+        assert loaded[node_id].state == node.state
+        assert dict(loaded[node_id].transitions) == dict(node.transitions)
+        assert dict(loaded[node_id].rewards) == dict(node.rewards)
+        assert loaded[node_id].is_terminal() == node.is_terminal()
+
+
+def test_resaving_a_memory_mapped_model_into_its_own_directory(tmp_path):
+    """
+    Saving a model loaded from a directory back into that directory must neither fail nor corrupt the files.
+    """
+    model = compile_model(generate("random", 2000, seed=0))
+    save_model(model, tmp_path)
+    save_model(load_model(tmp_path, mmap=True), tmp_path)
+
+    reloaded = load_model(tmp_path, mmap=False)
+    for name in ARRAYS:
+        assert np.array_equal(getattr(reloaded, name), getattr(model, name))
+    assert reloaded.state_ids == list(model.state_ids)
+    assert not any(path.name.endswith(".tmp") for path in tmp_path.iterdir())
@@ -0,0 +1,30 @@
+import asyncio
+
+from benchmarks.generators import generate
+from src.model import compile_model
+from src.service import SolverService
+
+
+def test_cancelling_the_first_caller_keeps_coalesced_callers_and_caches_the_result():
+    """
+    Cancelling the caller that started a solve must not cancel the callers coalesced onto it,
+    and the finished result must still be cached.
+    """
+    async def scenario():
+        service = SolverService()
+        model = compile_model(generate("random", 2000, seed=1))
+        first = asyncio.ensure_future(service.solve(model))
+        await asyncio.sleep(0)
+        second = asyncio.ensure_future(service.solve(model))
+        await asyncio.sleep(0)
+        first.cancel()
+
+        values, _ = await second
+        assert first.cancelled() and not second.cancelled()
+        assert service.stats["misses"] == 1 and service.stats["coalesced"] == 1
+        assert len(service.cache) == 1
+
+        cached_values, _ = await service.solve(model)
+        assert cached_values is values and service.stats["hits"] == 1
+
+    asyncio.run(scenario())
@@ -0,0 +1,103 @@
+import numpy as np
+import pytest
+
+from benchmarks.generators import generate
+from src.mdp import initialize_nodes
+from src.model import compile_model
+from src.parallel import parallel_value_iteration
+from src.policy_evaluation import evaluate_policies, solve_policy_evaluation
+from src.policy_iteration import policy_iteration, solve_policy_iteration
+from src.topological import solve_topological, topological_value_iteration
+from src.value_iteration import solve_value_iteration
+
+GAMMA = 0.9
+
+# Each solver is checked against value iteration run to a tight threshold
+MODELS = {
+    "initialize_nodes": initialize_nodes,
+    "random": lambda: generate("random", 200, seed=0),
+}
+
+
+def _reference(model):
+    """
+    Optimal values of a model, from value iteration with a tight threshold.
+    :return: Tuple (values, policy).
+    """
+    values, policy, _ = solve_value_iteration(model, threshold=1e-12, discount_factor=GAMMA, mode="sync")
+    return values, policy
+
+
+@pytest.mark.parametrize("name", MODELS)
+@pytest.mark.parametrize("evaluation_sweeps", [None, 5])
+def test_policy_iteration_matches_value_iteration(name, evaluation_sweeps):
+    """
+    Exact and modified policy iteration must reach the optimal values, on the model and through the nodes.
+    """
+    nodes = MODELS[name]()
+    model = compile_model(nodes)
+    expected, _ = _reference(model)
+
+    values, _, _ = solve_policy_iteration(model, discount_factor=GAMMA, threshold=1e-12,
+                                          evaluation_sweeps=evaluation_sweeps)
+    assert np.allclose(values, expected, atol=1e-8)
+
+    policy_iteration(nodes, threshold=1e-12, discount_factor=GAMMA, evaluation_sweeps=evaluation_sweeps)
+    assert np.allclose(model.values_from_nodes(nodes), expected, atol=1e-8)
+
+
+@pytest.mark.parametrize("name", MODELS)
+@pytest.mark.parametrize("mode", ["jacobi", "async"])
+def test_parallel_value_iteration_matches_value_iteration(name, mode):
+    """
+    Shared-memory value iteration over two worker processes must converge to the same values.
+    """
+    nodes = MODELS[name]()
+    model = compile_model(nodes)
+    expected, _ = _reference(model)
+
+    parallel_value_iteration(nodes, threshold=1e-12, discount_factor=GAMMA, processes=2, mode=mode)
+    assert np.allclose(model.values_from_nodes(nodes), expected, atol=1e-8)
+
+
+@pytest.mark.parametrize("nodes_factory", [*MODELS.values(), lambda: generate("layered", 500, seed=0),
+                                           lambda: generate("grid", 100, seed=0)])
+def test_topological_value_iteration_matches_value_iteration(nodes_factory):
+    """
+    Level-by-level backups of acyclic components and sweeps of cyclic ones must give the optimal values.
+    """
+    nodes = nodes_factory()
+    model = compile_model(nodes)
+    expected, _ = _reference(model)
+
+    values, _, stats = solve_topological(model, threshold=1e-12, discount_factor=GAMMA)
+    assert np.allclose(values, expected, atol=1e-8)
+    assert stats["levels"] <= stats["components"]
+
+    topological_value_iteration(nodes, threshold=1e-12, discount_factor=GAMMA)
+    assert np.allclose(model.values_from_nodes(nodes), expected, atol=1e-8)
+
+
+@pytest.mark.parametrize("name", MODELS)
+@pytest.mark.parametrize("method", ["exact", "iterative"])
+def test_batched_policy_evaluation_matches_value_iteration(name, method):
+    """
+    Evaluating the optimal policy must give the optimal values; a randomly drawn policy evaluated
+    in the same batch must get the values of evaluating it on its own.
+    """
+    nodes = MODELS[name]()
+    model = compile_model(nodes)
+    expected, optimal = _reference(model)
+    rng = np.random.default_rng(0)
+    other = np.array([rng.choice(np.flatnonzero(mask)) if mask.any() else -1 for mask in model.action_mask])
+
+    values = solve_policy_evaluation(model, np.stack([optimal, other]), discount_factor=GAMMA, method=method,
+                                     threshold=1e-12)
+    assert np.allclose(values[0], expected, atol=1e-8)
+    assert np.allclose(values[1], solve_policy_evaluation(model, other, discount_factor=GAMMA)[0], atol=1e-8)
+
+    # Node API: one policy per dictionary {node ID: action label}
+    labels = model.policy_labels(optimal)
+    node_values = evaluate_policies(nodes, [dict(zip(model.state_ids, labels))], discount_factor=GAMMA,
+                                    method=method, threshold=1e-12)
+    assert np.allclose(node_values[0], expected, atol=1e-8)